@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BlogAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog_app"
+
+    def ready(self):
+        from . import signals, task_metrics  # noqa: F401
@@ -0,0 +1,140 @@
+"""
+Async versions of the read-heavy endpoints, served under /api/async/ by an ASGI server.
+
+DRF's ``@api_view`` is synchronous, so these are plain Django async views: they
+authenticate with ``ProfileJWTAuthentication.aauthenticate``, query through the async
+ORM and share the sync views' query, visibility and serialization helpers, validators
+and response cache, returning the same JSON. A view never blocks the event loop on the database, and where
+it needs both the database and the response cache it waits for them concurrently.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+
+from . import conditional, response_cache, views
+from .authentication import ProfileJWTAuthentication
+from .models import Like, Post
+from .pagination import KeysetPagination, get_post_paginator
+from .serializers import LikeSerializer, PostSerializer
+
+
+# Cache calls run on their own thread so they overlap with the request's ORM thread
+cache_get = sync_to_async(response_cache.get, thread_sensitive=False)
+cache_store = sync_to_async(response_cache.store, thread_sensitive=False)
+
+
+def error_response(exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    response = JsonResponse(data, status=exc.status_code, safe=False)
+    if exc.status_code == 401:
+        response["WWW-Authenticate"] = ProfileJWTAuthentication().authenticate_header(None)
+    return response
+
+
+def async_api_view(view):
+    """GET-only, authenticated; hands the view a DRF ``Request`` for query_params."""
+    authenticator = ProfileJWTAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            result = await authenticator.aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            drf_request = Request(request)
+            drf_request.user, drf_request.auth = result
+            return await view(drf_request, *args, **kwargs)
+        except APIException as exc:
+            return error_response(exc)
+
+    return wrapper
+
+
+@async_api_view
+async def post_list(request):
+    posts = views.filter_posts(request)
+    paginator = get_post_paginator(request)
+    if isinstance(paginator, KeysetPagination):
+        page = await paginator.apaginate_queryset(posts, request)
+    else:
+        page = await sync_to_async(paginator.paginate_queryset)(posts, request)
+    etag = conditional.post_list_validators(request, paginator, page)
+    not_modified = conditional.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    data = paginator.get_paginated_response(PostSerializer(page, many=True).data).data
+    return conditional.apply(JsonResponse(data), etag)
+
+
+@async_api_view
+async def post_detail(request, pk):
+    # The cache lookup is speculative: it runs alongside the validator query and is
+    # only used once the draft and ETag checks have passed
+    values, (cache_key, cached) = await asyncio.gather(
+        views.post_detail_values(pk).afirst(),
+        cache_get('post_detail', pk, request),
+    )
+    denial = views.post_detail_denial(request, values)
+    if denial is not None:
+        code, data = denial
+        return HttpResponse(status=code) if data is None else JsonResponse(data, status=code)
+
+    etag = conditional.post_detail_validators(values)
+    not_modified = conditional.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if cached is not None:
+        return conditional.apply(JsonResponse(cached, headers={'X-Cache': 'HIT'}), etag)
+
+    post = await views.post_detail_body(pk).aget()
+    data = PostSerializer(post).data
+    if post.status == 'published':
+        await cache_store(cache_key, data)
+    return conditional.apply(JsonResponse(data, headers={'X-Cache': 'MISS'}), etag)
+
+
+@async_api_view
+async def comment_list(request, post_pk):
+    values, (cache_key, cached) = await asyncio.gather(
+        views.comment_list_values(post_pk).afirst(),
+        cache_get('comment_list', post_pk, request),
+    )
+    if values is None:
+        return HttpResponse(status=404)
+
+    etag = conditional.comment_list_validators(request, values)
+    not_modified = conditional.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if cached is not None:
+        response = JsonResponse(cached, safe=False, headers={'X-Cache': 'HIT'})
+        return conditional.apply(response, etag)
+
+    comments, paginator = views.comment_list_body(request, post_pk)
+    if paginator is not None:
+        comments = await paginator.apaginate_queryset(comments, request)
+    else:
+        comments = [comment async for comment in comments]
+    data = views.comment_list_data(paginator, comments)
+    if values['status'] == 'published':
+        await cache_store(cache_key, data)
+    response = JsonResponse(data, safe=False, headers={'X-Cache': 'MISS'})
+    return conditional.apply(response, etag)
+
+
+@async_api_view
+async def get_likes(request, post_id):
+    likes = [like async for like in LikeSerializer.setup_eager_loading(Like.objects.filter(post_id=post_id))]
+    # Only an empty result needs the existence check
+    if not likes and not await Post.objects.filter(pk=post_id).aexists():
+        return JsonResponse({"detail": "Post not found"}, status=404)
+    return JsonResponse(LikeSerializer(likes, many=True).data, safe=False)
@@ -0,0 +1,120 @@
+"""
+JWT authentication that loads the user together with its Author or Reader profile.
+
+``JWTAuthentication`` fetches the bare user, and views then paid one more query for
+``request.user.author`` or ``Reader.objects.get(user=...)``. Here the user comes with
+both reverse one-to-one profiles from a single joined query, so ``request.user.author``
+and ``request.user.reader`` cost nothing in permissions and views. With
+``AUTH_PROFILE_CACHE_TIMEOUT`` set, the loaded identity is also kept in the cache for
+that many seconds and dropped whenever the user or one of its profiles is saved.
+Decoding the token is also where a recent writer's reads get pinned to the primary.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import db_router
+from .models import User
+
+
+def identity_cache_key(user_id):
+    return f"auth:identity:{user_id}"
+
+
+def invalidate_identity(user_id):
+    """Drop the cached identity; a no-op with the cache off, and never fails the write that called it."""
+    if not settings.AUTH_PROFILE_CACHE_TIMEOUT:
+        return
+    try:
+        cache.delete(identity_cache_key(user_id))
+    except RedisError:
+        # An entry that could not be dropped still expires after AUTH_PROFILE_CACHE_TIMEOUT
+        pass
+
+
+def _identity_queryset(user_id):
+    return User.objects.select_related("author", "reader").filter(**{api_settings.USER_ID_FIELD: user_id})
+
+
+def load_identity(user_id):
+    """Return the user with ``author`` and ``reader`` resolved, or None."""
+    timeout = settings.AUTH_PROFILE_CACHE_TIMEOUT
+    key = identity_cache_key(user_id)
+    if timeout:
+        user = cache.get(key)
+        if user is not None:
+            return user
+    user = _identity_queryset(user_id).first()
+    if user is not None and timeout:
+        cache.set(key, user, timeout)
+    return user
+
+
+async def aload_identity(user_id):
+    timeout = settings.AUTH_PROFILE_CACHE_TIMEOUT
+    key = identity_cache_key(user_id)
+    if timeout:
+        user = await cache.aget(key)
+        if user is not None:
+            return user
+    user = await _identity_queryset(user_id).afirst()
+    if user is not None and timeout:
+        await cache.aset(key, user, timeout)
+    return user
+
+
+def author_profile(user):
+    """The user's Author profile or None; free when the user came from ``load_identity``."""
+    return getattr(user, "author", None)
+
+
+def reader_profile(user):
+    """The user's Reader profile or None; free when the user came from ``load_identity``."""
+    return getattr(user, "reader", None)
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        if db_router.is_pinned(user_id):
+            db_router.pin_to_primary()
+        return self.check_user(load_identity(user_id), validated_token)
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views, which run outside DRF's request cycle."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user_id = self.get_user_id(validated_token)
+        if await db_router.ais_pinned(user_id):
+            db_router.pin_to_primary()
+        user = await aload_identity(user_id)
+        return self.check_user(user, validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
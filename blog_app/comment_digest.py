@@ -0,0 +1,129 @@
+"""
+Coalesced comment notifications.
+
+Creating a comment only bumps a per-author Redis hash of ``post id -> new comments``
+and marks the author as pending. A periodic task reads pending authors in bulk and
+sends each one a single digest per window, so queue depth and database load follow
+the number of active authors rather than the number of comments.
+
+A run first renames the pending set to a processing set, so comments recorded while
+it sends land in a fresh pending set for the next window and the run always ends.
+Each author's buffer is moved aside the same way when their batch is claimed, and
+only deleted once that batch's digests are out, so a failed send loses nothing and
+the retry resumes with the same counts. Runs hold a lock, so two never share a
+snapshot.
+"""
+import uuid
+
+from django.conf import settings
+
+from .redis_client import get_redis
+
+
+PENDING_AUTHORS_KEY = "comments:pending_authors"
+PROCESSING_AUTHORS_KEY = "comments:processing_authors"
+LOCK_KEY = "comments:digest_lock"
+
+# Start a new snapshot unless an interrupted run left one to finish
+SNAPSHOT_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('SCARD', KEYS[2])
+"""
+
+# Move each author's live buffer aside, unless an earlier attempt already did, and return the moved counts
+CLAIM_SCRIPT = """
+local claimed = {}
+for i = 1, #KEYS, 2 do
+    if redis.call('EXISTS', KEYS[i + 1]) == 0 and redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('RENAME', KEYS[i], KEYS[i + 1])
+    end
+    claimed[#claimed + 1] = redis.call('HGETALL', KEYS[i + 1])
+end
+return claimed
+"""
+
+# Take back recorded comments, dropping the field once nothing is left
+RETRACT_SCRIPT = """
+if redis.call('HINCRBY', KEYS[1], ARGV[1], -tonumber(ARGV[2])) <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_scripts = {}
+
+
+def _script(source):
+    if source not in _scripts:
+        _scripts[source] = get_redis().register_script(source)
+    return _scripts[source]
+
+
+def _buffer_key(author_id):
+    return f"comments:pending:{author_id}"
+
+
+def _processing_key(author_id):
+    return f"comments:processing:{author_id}"
+
+
+def record(author_id, post_id):
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hincrby(_buffer_key(author_id), post_id, 1)
+    pipe.sadd(PENDING_AUTHORS_KEY, author_id)
+    pipe.execute()
+
+
+def retract(author_id, post_id, count):
+    """Take back ``count`` comments on ``post_id`` that have not been claimed by a digest run yet."""
+    _script(RETRACT_SCRIPT)(keys=[_buffer_key(author_id)], args=[post_id, count], client=get_redis())
+
+
+def lock():
+    """Return a token if this run may send digests, or None while another run holds the lock."""
+    token = uuid.uuid4().hex
+    if get_redis().set(LOCK_KEY, token, nx=True, ex=settings.COMMENT_DIGEST_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def unlock(token):
+    _script(RELEASE_SCRIPT)(keys=[LOCK_KEY], args=[token], client=get_redis())
+
+
+def snapshot():
+    """Freeze the authors this run will handle and return how many there are."""
+    return _script(SNAPSHOT_SCRIPT)(keys=[PENDING_AUTHORS_KEY, PROCESSING_AUTHORS_KEY], client=get_redis())
+
+
+def pending(batch_size=500):
+    """Return ``{author_id: {post_id: count}}`` for up to ``batch_size`` authors of the snapshot."""
+    client = get_redis()
+    author_ids = client.srandmember(PROCESSING_AUTHORS_KEY, batch_size) or []
+    if not author_ids:
+        return {}
+    keys = [key for author_id in author_ids for key in (_buffer_key(author_id), _processing_key(author_id))]
+    claimed = _script(CLAIM_SCRIPT)(keys=keys, client=client)
+    return {
+        int(author_id): {int(post_id): int(count) for post_id, count in zip(flat[::2], flat[1::2])}
+        for author_id, flat in zip(author_ids, claimed)
+    }
+
+
+def acknowledge(pending_counts):
+    """Drop a batch returned by ``pending`` from the snapshot once its digests are out."""
+    pipe = get_redis().pipeline(transaction=False)
+    for author_id in pending_counts:
+        pipe.delete(_processing_key(author_id))
+    if pending_counts:
+        pipe.srem(PROCESSING_AUTHORS_KEY, *pending_counts)
+    pipe.execute()
@@ -0,0 +1,58 @@
+"""
+ETag validators for read endpoints.
+
+Detail and comment validators come from a small query (newest ``updated_at``, row
+count and the denormalized counters), so a conditional GET is answered with 304
+before the bodies are loaded or serialized. List validators cover only the page
+being returned and are taken from its rows once they are loaded, so they cost no
+extra query; a 304 then saves the serialization.
+
+No Last-Modified is sent. A single timestamp cannot see a changed counter, a deleted
+comment or a different page, so If-Modified-Since would answer 304 for a changed body.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def check(request, etag):
+    """Return a 304 response if the client's copy is current, otherwise None."""
+    response = get_conditional_response(request._request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
+def apply(response, etag):
+    response["ETag"] = etag
+    return response
+
+
+def post_list_validators(request, paginator, page):
+    rows = [(post.id, post.updated_at, post.like_count, post.comment_count) for post in page]
+    # Besides the posts, a page carries its next link and, in page-number mode, the total
+    numbered = getattr(paginator, "page", None)
+    total = numbered.paginator.count if numbered is not None else None
+    # Authors see their own posts, so their list differs from every other viewer's
+    viewer = request.user.pk if request.user.role == "author" else "reader"
+    return make_etag(
+        "post_list", viewer, request.query_params.urlencode(), rows, paginator.get_next_link(), total,
+    )
+
+
+def post_detail_validators(post_values):
+    return make_etag(
+        "post_detail", post_values["id"], post_values["updated_at"],
+        post_values["like_count"], post_values["comment_count"],
+    )
+
+
+def comment_list_validators(request, post_values):
+    return make_etag(
+        "comment_list", post_values["id"], request.query_params.urlencode(),
+        post_values["last_comment"], post_values["comment_rows"],
+    )
@@ -0,0 +1,45 @@
+"""
+Per-process database connection metrics.
+
+Counts how often this process connected per alias (pool checkouts in "pool" mode),
+which shows connection churn in the "close" mode, and adds the psycopg pool's own
+statistics in "pool" mode: its size, idle connections, queued requests and the time
+requests spent waiting for a connection.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+
+_connects = {}
+_lock = threading.Lock()
+
+
+def record_connection(alias):
+    with _lock:
+        _connects[alias] = _connects.get(alias, 0) + 1
+
+
+def stats():
+    result = {}
+    for alias in connections:
+        with _lock:
+            entry = {"mode": settings.DATABASE_CONN_MODE, "connects": _connects.get(alias, 0)}
+        pool = connections[alias].pool if connections.settings[alias].get("OPTIONS", {}).get("pool") else None
+        if pool is not None:
+            pool_stats = pool.get_stats()
+            entry.update(
+                pool_min=pool_stats["pool_min"],
+                pool_max=pool_stats["pool_max"],
+                pool_size=pool_stats["pool_size"],
+                pool_available=pool_stats["pool_available"],
+                requests_waiting=pool_stats.get("requests_waiting", 0),
+                requests_total=pool_stats.get("requests_num", 0),
+                requests_queued=pool_stats.get("requests_queued", 0),
+                requests_wait_ms=pool_stats.get("requests_wait_ms", 0),
+                requests_errors=pool_stats.get("requests_errors", 0),
+                connections_opened_by_pool=pool_stats.get("connections_num", 0),
+            )
+        result[alias] = entry
+    return result
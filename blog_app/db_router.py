@@ -0,0 +1,154 @@
+"""
+Primary/replica database routing.
+
+Reads made while serving a GET (or HEAD/OPTIONS) request go to a randomly chosen
+replica; everything else goes to the primary: writes, reads inside unsafe
+requests, and all work outside the request cycle (Celery tasks, management
+commands), which may read rows they or a request just wrote.
+
+Read-your-writes: after a user's successful unsafe request, their reads stay on the
+primary for ``READ_YOUR_WRITES_WINDOW`` seconds. The pin lives in the shared cache,
+keyed on the user id, and is checked while the JWT is authenticated.
+
+Each process measures replica lag at most every ``DATABASE_REPLICA_CHECK_INTERVAL``
+seconds and leaves out replicas that lag more than ``DATABASE_REPLICA_MAX_LAG``
+seconds or cannot be queried. With no healthy replica, reads go to the primary.
+"""
+import contextvars
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Seconds behind the primary; 0 when caught up or when the server is not a standby
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# "replica" while serving a safe request, "primary" otherwise
+_reads = contextvars.ContextVar("db_reads", default="primary")
+
+_healthy = []
+_checked_at = None
+_check_lock = threading.Lock()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def _pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def replica_lag(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def healthy_replicas():
+    global _healthy, _checked_at
+    now = time.monotonic()
+    if _checked_at is None or now - _checked_at >= settings.DATABASE_REPLICA_CHECK_INTERVAL:
+        # One thread re-checks; the others keep using the previous result meanwhile
+        if _check_lock.acquire(blocking=False):
+            try:
+                healthy = []
+                for alias in replica_aliases():
+                    try:
+                        if replica_lag(alias) <= settings.DATABASE_REPLICA_MAX_LAG:
+                            healthy.append(alias)
+                    except DatabaseError:
+                        pass
+                _healthy, _checked_at = healthy, now
+            finally:
+                _check_lock.release()
+    return _healthy
+
+
+def pin_to_primary():
+    _reads.set("primary")
+
+
+def is_pinned(user_id):
+    return _reads.get() == "replica" and bool(cache.get(_pin_key(user_id)))
+
+
+async def ais_pinned(user_id):
+    return _reads.get() == "replica" and bool(await cache.aget(_pin_key(user_id)))
+
+
+def _record_write(request, response):
+    user = getattr(request, "user", None)
+    if request.method not in SAFE_METHODS and response.status_code < 400 and user and user.is_authenticated:
+        return _pin_key(user.pk)
+    return None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reads.get() == "replica":
+            replicas = healthy_replicas()
+            if replicas:
+                return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def ReplicaRoutingMiddleware(get_response):
+    """Allow replica reads for safe requests and pin writers to the primary afterwards."""
+    if not replica_aliases():
+        return get_response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _reads.set("replica" if request.method in SAFE_METHODS else "primary")
+            try:
+                response = await get_response(request)
+            finally:
+                _reads.reset(token)
+            pin_key = _record_write(request, response)
+            if pin_key:
+                await cache.aset(pin_key, 1, settings.READ_YOUR_WRITES_WINDOW)
+            return response
+
+        return markcoroutinefunction(middleware)
+
+    def middleware(request):
+        token = _reads.set("replica" if request.method in SAFE_METHODS else "primary")
+        try:
+            response = get_response(request)
+        finally:
+            _reads.reset(token)
+        pin_key = _record_write(request, response)
+        if pin_key:
+            cache.set(pin_key, 1, settings.READ_YOUR_WRITES_WINDOW)
+        return response
+
+    return middleware
+
+
+ReplicaRoutingMiddleware.sync_capable = True
+ReplicaRoutingMiddleware.async_capable = True
@@ -0,0 +1,56 @@
+"""
+Streaming NDJSON / CSV exports.
+
+Rows come from ``values()`` querysets read through a server-side cursor with
+``iterator(chunk_size=...)`` and are encoded one at a time, so memory use does not
+depend on the size of the export and the first bytes are sent immediately.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Like, Post
+
+
+CHUNK_SIZE = 2000
+
+# dataset -> (model, author lookup, exported fields)
+DATASETS = {
+    "posts": (Post, "author_id", [
+        "id", "author_id", "title", "content", "status", "like_count", "comment_count", "created_at", "updated_at",
+    ]),
+    "comments": (Comment, "post__author_id", [
+        "id", "post_id", "user_id", "user__username", "content", "created_at", "updated_at",
+    ]),
+    "likes": (Like, "post__author_id", ["id", "post_id", "user_id", "user__username"]),
+    "followers": (Follow, "author_id", ["id", "reader_id", "reader__user__username", "created_at"]),
+}
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def rows(dataset, author_id=None):
+    model, author_lookup, fields = DATASETS[dataset]
+    queryset = model.objects.all()
+    if author_id is not None:
+        queryset = queryset.filter(**{author_lookup: author_id})
+    return fields, queryset.order_by("pk").values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() hands the encoded line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def encode(fmt, fields, values):
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in values:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in values:
+            yield encoder.encode(dict(zip(fields, row))) + "\n"
@@ -0,0 +1,124 @@
+"""
+Home feed for readers.
+
+Each reader has a Redis sorted set of post ids scored by ``created_at``. Publishing a
+post pushes its id into every follower's timeline (fan-out on write), except for
+authors with very many followers: their posts are merged in when the feed is read
+(fan-out on read), so one popular author never triggers millions of writes.
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from . import follows
+from .models import Author, Follow, Post
+from .redis_client import get_redis
+
+
+CELEBRITIES_KEY = "feed:celebrities"
+# Empty timelines keep this member so a missing key always means "needs a rebuild"
+EMPTY_MARKER = "0"
+
+# Push into a timeline only if it is already materialized, then trim it to its cap
+PUSH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+end
+"""
+
+_push_script = None
+
+
+def timeline_key(reader_id):
+    return f"feed:timeline:{reader_id}"
+
+
+def post_score(post):
+    return post.created_at.timestamp()
+
+
+def is_celebrity(author_id):
+    follower_count = Author.objects.filter(pk=author_id).values_list("follower_count", flat=True).first() or 0
+    return follower_count >= settings.FEED_FANOUT_FOLLOWER_LIMIT
+
+
+def fan_out(post, batch_size=1000):
+    """Push a published post into its author's followers' timelines. Returns the number of followers reached."""
+    global _push_script
+    client = get_redis()
+    if is_celebrity(post.author_id):
+        client.sadd(CELEBRITIES_KEY, post.author_id)
+        return 0
+    client.srem(CELEBRITIES_KEY, post.author_id)
+
+    if _push_script is None:
+        _push_script = client.register_script(PUSH_SCRIPT)
+    score = post_score(post)
+    pipe = client.pipeline(transaction=False)
+    reached = 0
+    for reader_id in follows.follower_ids(post.author_id):
+        _push_script(keys=[timeline_key(reader_id)], args=[score, post.id, settings.FEED_MAX_LENGTH], client=pipe)
+        reached += 1
+        if reached % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+    return reached
+
+
+def invalidate_timeline(reader_id):
+    get_redis().delete(timeline_key(reader_id))
+
+
+def rebuild_timeline(reader_id, followed_author_ids, celebrity_ids):
+    """Materialize a reader's timeline from Postgres."""
+    author_ids = [a for a in followed_author_ids if a not in celebrity_ids]
+    posts = (
+        Post.objects.filter(author_id__in=author_ids, status="published")
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[:settings.FEED_MAX_LENGTH]
+    )
+    members = {str(post_id): created_at.timestamp() for post_id, created_at in posts}
+    members.setdefault(EMPTY_MARKER, 0)
+    key = timeline_key(reader_id)
+    pipe = get_redis().pipeline()
+    pipe.delete(key)
+    pipe.zadd(key, members)
+    pipe.execute()
+
+
+def get_feed_page(reader_id, limit, before=None):
+    """
+    Return ``(post_ids, next_before)`` for one page of a reader's feed, newest first.
+    ``before`` is the exclusive score cursor returned by the previous page.
+    """
+    client = get_redis()
+    followed = set(Follow.objects.filter(reader_id=reader_id).values_list("author_id", flat=True))
+    celebrity_ids = {int(a) for a in client.smembers(CELEBRITIES_KEY)} & followed
+
+    key = timeline_key(reader_id)
+    if not client.exists(key):
+        rebuild_timeline(reader_id, followed, celebrity_ids)
+
+    upper = f"({before}" if before is not None else "+inf"
+    entries = [
+        (score, int(member))
+        for member, score in client.zrevrangebyscore(key, upper, "-inf", start=0, num=limit + 1, withscores=True)
+        if member != EMPTY_MARKER
+    ]
+
+    if celebrity_ids:
+        posts = Post.objects.filter(author_id__in=celebrity_ids, status="published")
+        if before is not None:
+            posts = posts.filter(created_at__lt=datetime.fromtimestamp(before, tz=timezone.utc))
+        entries += [
+            (created_at.timestamp(), post_id)
+            for post_id, created_at in posts.order_by("-created_at", "-id").values_list("id", "created_at")[:limit + 1]
+        ]
+        # A post can be in both sources if its author crossed the threshold after it was fanned out
+        entries = sorted({post_id: score for score, post_id in entries}.items(), key=lambda e: e[1], reverse=True)
+        entries = [(score, post_id) for post_id, score in entries]
+
+    page = entries[:limit]
+    next_before = page[-1][0] if len(entries) > limit else None
+    return [post_id for _, post_id in page], next_before
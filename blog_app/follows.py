@@ -0,0 +1,136 @@
+"""
+Follow graph.
+
+Follow and unfollow are single SQL statements that resolve the reader profile,
+check the author, write or remove the edge and adjust ``Author.follower_count``;
+the (reader, author) unique constraint makes concurrent double follows collapse
+into one row.
+
+Both directions of the graph are mirrored in sets (see ``member_sets``): each reader's
+followed authors, so ``is_following`` for a whole page of authors is one SMISMEMBER,
+and each author's followers, which feed fan-out reads instead of the Follow table.
+``FOLLOW_GRAPH_BACKEND = "local"`` keeps the sets in process memory instead of Redis.
+"""
+from django.conf import settings
+from django.db import connection
+
+from . import member_sets
+from .models import Author, Follow, Reader
+
+
+MAX_AUTHORS = 100
+
+FOLLOW_SQL = f"""
+WITH reader AS (
+    SELECT id FROM {Reader._meta.db_table} WHERE user_id = %(user_id)s
+), target AS (
+    SELECT id FROM {Author._meta.db_table} WHERE id = %(author_id)s
+), inserted AS (
+    INSERT INTO {Follow._meta.db_table} (reader_id, author_id, created_at)
+    SELECT reader.id, target.id, NOW() FROM reader, target
+    ON CONFLICT (reader_id, author_id) DO NOTHING
+    RETURNING id, author_id, created_at
+), counted AS (
+    UPDATE {Author._meta.db_table} SET follower_count = follower_count + 1
+    WHERE id IN (SELECT author_id FROM inserted)
+    RETURNING id
+)
+SELECT (SELECT id FROM reader), EXISTS (SELECT 1 FROM target),
+       (SELECT id FROM inserted), (SELECT created_at FROM inserted), EXISTS (SELECT 1 FROM counted)
+"""
+
+UNFOLLOW_SQL = f"""
+WITH reader AS (
+    SELECT id FROM {Reader._meta.db_table} WHERE user_id = %(user_id)s
+), deleted AS (
+    DELETE FROM {Follow._meta.db_table}
+    WHERE reader_id IN (SELECT id FROM reader) AND author_id = %(author_id)s
+    RETURNING author_id
+), counted AS (
+    UPDATE {Author._meta.db_table} SET follower_count = GREATEST(follower_count - 1, 0)
+    WHERE id IN (SELECT author_id FROM deleted)
+    RETURNING id
+)
+SELECT (SELECT id FROM reader), EXISTS (SELECT 1 FROM deleted), EXISTS (SELECT 1 FROM counted)
+"""
+
+_redis_sets = member_sets.RedisSets("FOLLOW_GRAPH_TTL")
+_local_sets = None
+
+
+def _sets():
+    global _local_sets
+    if settings.FOLLOW_GRAPH_BACKEND != "local":
+        return _redis_sets
+    if _local_sets is None:
+        _local_sets = member_sets.LocalSets()
+    return _local_sets
+
+
+def following_key(reader_id):
+    return f"follow:following:{reader_id}"
+
+
+def followers_key(author_id):
+    return f"follow:followers:{author_id}"
+
+
+def graph_keys(reader_ids=(), author_ids=()):
+    """Every Redis key the graph keeps for these readers and authors, for cleanup after bulk deletes."""
+    keys = [following_key(reader_id) for reader_id in reader_ids]
+    keys += [followers_key(author_id) for author_id in author_ids]
+    return keys + [member_sets.generation_key(key) for key in keys]
+
+
+def _execute(sql, user_id, author_id):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"user_id": user_id, "author_id": author_id})
+        return cursor.fetchone()
+
+
+def _write(command, reader_id, author_id):
+    sets = _sets()
+    sets.write(following_key(reader_id), command, author_id)
+    sets.write(followers_key(author_id), command, reader_id)
+
+
+def follow(user_id, author_id):
+    """
+    Return ``(reader_id, author_exists, follow)``. ``reader_id`` is None when the user
+    has no reader profile; ``follow`` is ``(id, created_at)`` of the new edge, or None
+    when the reader already followed the author.
+    """
+    reader_id, author_exists, follow_id, created_at, _ = _execute(FOLLOW_SQL, user_id, author_id)
+    if follow_id is None:
+        return reader_id, author_exists, None
+    _write("SADD", reader_id, author_id)
+    return reader_id, author_exists, (follow_id, created_at)
+
+
+def unfollow(user_id, author_id):
+    """Return ``(reader_id, unfollowed)``."""
+    reader_id, unfollowed, _ = _execute(UNFOLLOW_SQL, user_id, author_id)
+    if unfollowed:
+        _write("SREM", reader_id, author_id)
+    return reader_id, unfollowed
+
+
+def is_following(reader_id, author_ids):
+    """Return ``{author_id: bool}`` for up to ``MAX_AUTHORS`` authors in one set lookup."""
+    author_ids = list(dict.fromkeys(author_ids))[:MAX_AUTHORS]
+    if not author_ids:
+        return {}
+    states = _sets().contains(
+        following_key(reader_id), author_ids,
+        lambda: Follow.objects.filter(reader_id=reader_id).values_list("author_id", flat=True),
+    )
+    return dict(zip(author_ids, states))
+
+
+def follower_ids(author_id):
+    """Return the reader ids following ``author_id``."""
+    members = _sets().members(
+        followers_key(author_id),
+        lambda: Follow.objects.filter(author_id=author_id).values_list("reader_id", flat=True).iterator(),
+    )
+    return {int(reader_id) for reader_id in members}
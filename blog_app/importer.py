@@ -0,0 +1,148 @@
+"""
+Streaming bulk import of posts from NDJSON.
+
+Input is consumed one line at a time and written in batches with ``bulk_create``,
+so memory stays flat however large the input is. Authors and tags are resolved
+through in-memory maps that only hit the database for names not seen yet. Published
+posts are fanned out to their followers' feeds as each batch commits, as when a post
+is published, while per-post notifications are replaced by one digest per author at
+the end.
+"""
+import json
+import time
+
+from django.db import transaction
+
+from .models import Author, Post, Tag
+from .search import update_search_vector
+from .tasks import fan_out_post_to_feeds, notify_readers_of_post_digest
+
+
+STATUSES = {choice for choice, _ in Post.STATUS_CHOICES}
+MAX_REPORTED_ERRORS = 100
+
+
+class RecordError(ValueError):
+    pass
+
+
+class TagMap:
+    def __init__(self):
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = set(names) - self.ids.keys()
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            self.ids.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+        return [self.ids[name] for name in names]
+
+
+class AuthorMap:
+    """Resolve the ``author`` field of a record (id or username) to an author id."""
+
+    def __init__(self, default=None):
+        self.default = default
+        self.ids = {}
+
+    def resolve(self, value):
+        if value is None:
+            if self.default is None:
+                raise RecordError("author is required")
+            return self.default
+        # bool is an int subclass, so True would otherwise look up author 1
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise RecordError("author must be an author id or a username")
+        if value not in self.ids:
+            lookup = {"pk": value} if isinstance(value, int) else {"user__username": value}
+            self.ids[value] = Author.objects.filter(**lookup).values_list("pk", flat=True).first()
+        if self.ids[value] is None:
+            raise RecordError(f"unknown author {value!r}")
+        return self.ids[value]
+
+
+class FixedAuthor:
+    """Author-scoped imports ignore any author field in the input."""
+
+    def __init__(self, author_id):
+        self.author_id = author_id
+
+    def resolve(self, value):
+        return self.author_id
+
+
+def parse_record(line, authors):
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise RecordError("expected a JSON object")
+    title, content = record.get("title"), record.get("content")
+    if not title or not content:
+        raise RecordError("title and content are required")
+    status = record.get("status", "draft")
+    if status not in STATUSES:
+        raise RecordError(f"invalid status {status!r}")
+    tags = record.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) and tag for tag in tags):
+        raise RecordError("tags must be a list of names")
+    post = Post(author_id=authors.resolve(record.get("author")), title=title[:255], content=content, status=status)
+    return post, tags
+
+
+def import_posts(lines, authors, batch_size=2000, notify=True):
+    """
+    Import NDJSON ``lines`` (str or bytes). Returns a summary with the imported row
+    count, rows per second and the first ``MAX_REPORTED_ERRORS`` rejected lines.
+    """
+    tags = TagMap()
+    published_per_author = {}
+    errors = []
+    imported = 0
+    batch = []
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal imported
+        with transaction.atomic():
+            tags.resolve({name for _, names in batch for name in names})
+            posts = Post.objects.bulk_create([post for post, _ in batch])
+            through = Post.tags.through
+            through.objects.bulk_create([
+                through(post_id=post.id, tag_id=tag_id)
+                for post, names in batch
+                for tag_id in set(tags.resolve(names))
+            ], ignore_conflicts=True)
+            update_search_vector([post.id for post in posts])
+        for post in posts:
+            if post.status == "published":
+                published_per_author[post.author_id] = published_per_author.get(post.author_id, 0) + 1
+                fan_out_post_to_feeds.delay(post.id)
+        imported += len(posts)
+        batch.clear()
+
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            batch.append(parse_record(line, authors))
+        except (ValueError, TypeError) as exc:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": number, "error": str(exc)})
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if notify:
+        for author_id, count in published_per_author.items():
+            notify_readers_of_post_digest.delay(author_id, count)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "imported": imported,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed) if elapsed else imported,
+        "errors": errors,
+    }
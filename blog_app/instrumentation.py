@@ -0,0 +1,273 @@
+"""
+Per-request instrumentation.
+
+A sampled request records its wall time, the time and number of its SQL queries,
+response cache hits and misses, and serialization time: serializer representation
+plus JSON rendering, less any SQL run while serializing. The numbers are sent back
+in a ``Server-Timing`` header and added to this process's metric totals.
+
+Every ``METRICS_FLUSH_INTERVAL`` seconds a process adds its totals to one Redis hash,
+so ``/metrics`` reports all workers together, in Prometheus text format.
+
+Celery workers add their task metrics to the same hash through ``observe`` and
+``increment`` (see blog_app.task_metrics).
+
+Requests outside the ``INSTRUMENTATION_SAMPLE_RATE`` sample cost one ``random()``
+call: the query wrapper and the serializer hook return straight away when no
+sampled request is running.
+"""
+import contextvars
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.renderers import JSONRenderer
+
+from .redis_client import get_redis
+
+
+METRICS_KEY = "metrics:http"
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+# name -> (type, help)
+FAMILIES = {
+    "blog_http_request_duration_seconds": ("histogram", "Wall time of sampled requests by URL name."),
+    "blog_http_request_db_seconds": ("histogram", "SQL time of sampled requests by URL name."),
+    "blog_http_request_queries_total": ("counter", "SQL queries run by sampled requests."),
+    "blog_http_request_serialize_seconds_total": ("counter", "Serialization time of sampled requests."),
+    "blog_response_cache_lookups_total": ("counter", "Response cache lookups by sampled requests."),
+    "blog_celery_task_queue_wait_seconds": ("histogram", "Time from enqueue (or ETA) to task start."),
+    "blog_celery_task_runtime_seconds": ("histogram", "Task run time by final state."),
+    "blog_celery_task_retries_total": ("counter", "Task retries scheduled."),
+}
+
+_LE = re.compile(r',?le="([^"]+)"')
+
+
+class Sample:
+    __slots__ = ("start", "db", "queries", "cache_hits", "cache_misses", "serialize", "serializing")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serialize = 0.0
+        self.serializing = False
+
+
+# The sample of the request being served, if it was picked
+_current = contextvars.ContextVar("instrumentation_sample", default=None)
+
+_totals = defaultdict(float)
+_totals_lock = threading.Lock()
+_flushed_at = time.monotonic()
+_flush_lock = threading.Lock()
+
+
+def _sampled():
+    rate = settings.INSTRUMENTATION_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection; times queries of sampled requests."""
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.db += time.perf_counter() - start
+        sample.queries += 1
+
+
+def install(connection):
+    # Reconnects reuse the wrapper object, which keeps its execute_wrappers
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_cache(outcome):
+    sample = _current.get()
+    if sample is not None:
+        if outcome == "hits":
+            sample.cache_hits += 1
+        else:
+            sample.cache_misses += 1
+
+
+def _timed_serialization(sample, serialize, *args):
+    sample.serializing = True
+    db_before = sample.db
+    start = time.perf_counter()
+    try:
+        return serialize(*args)
+    finally:
+        sample.serialize += time.perf_counter() - start - (sample.db - db_before)
+        sample.serializing = False
+
+
+class TimedRepresentationMixin:
+    """Counts the outermost serializer's representation time toward the request's sample."""
+
+    def to_representation(self, instance):
+        sample = _current.get()
+        if sample is None or sample.serializing:
+            return super().to_representation(instance)
+        return _timed_serialization(sample, super().to_representation, instance)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        sample = _current.get()
+        if sample is None or sample.serializing:
+            return super().render(data, accepted_media_type, renderer_context)
+        return _timed_serialization(sample, super().render, data, accepted_media_type, renderer_context)
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _observe(totals, name, labels, value, buckets=BUCKETS):
+    for bound in buckets:
+        if value <= bound:
+            totals[f'{name}_bucket{{{labels},le="{bound}"}}'] += 1
+    totals[f'{name}_bucket{{{labels},le="+Inf"}}'] += 1
+    totals[f"{name}_sum{{{labels}}}"] += value
+    totals[f"{name}_count{{{labels}}}"] += 1
+
+
+def observe(name, value, buckets=BUCKETS, **labels):
+    with _totals_lock:
+        _observe(_totals, name, _labels(**labels), value, buckets)
+
+
+def increment(name, amount=1, **labels):
+    with _totals_lock:
+        _totals[f"{name}{{{_labels(**labels)}}}"] += amount
+
+
+def _record(request, response, sample):
+    duration = time.perf_counter() - sample.start
+    match = request.resolver_match
+    view = match.view_name if match else "unmatched"
+    labels = _labels(view=view, method=request.method)
+    with _totals_lock:
+        _observe(_totals, "blog_http_request_duration_seconds", f'{labels},status="{response.status_code}"', duration)
+        _observe(_totals, "blog_http_request_db_seconds", labels, sample.db)
+        _totals[f"blog_http_request_queries_total{{{labels}}}"] += sample.queries
+        _totals[f"blog_http_request_serialize_seconds_total{{{labels}}}"] += sample.serialize
+        if sample.cache_hits:
+            _totals[f'blog_response_cache_lookups_total{{{_labels(view=view, result="hit")}}}'] += sample.cache_hits
+        if sample.cache_misses:
+            _totals[f'blog_response_cache_lookups_total{{{_labels(view=view, result="miss")}}}'] += sample.cache_misses
+
+    if settings.SERVER_TIMING_HEADER:
+        response["Server-Timing"] = (
+            f'db;dur={sample.db * 1000:.1f};desc="{sample.queries} queries", '
+            f'cache;desc="{sample.cache_hits} hits {sample.cache_misses} misses", '
+            f"serialize;dur={sample.serialize * 1000:.1f}, "
+            f"total;dur={duration * 1000:.1f}"
+        )
+
+
+def flush_due():
+    return time.monotonic() - _flushed_at >= settings.METRICS_FLUSH_INTERVAL
+
+
+def flush():
+    """Add this process's totals to the shared hash; on failure they are kept for the next flush."""
+    global _totals, _flushed_at
+    # One thread flushes; the others keep recording meanwhile
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        with _totals_lock:
+            totals, _totals = _totals, defaultdict(float)
+        _flushed_at = time.monotonic()
+        if not totals:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for series, value in totals.items():
+                pipe.hincrbyfloat(METRICS_KEY, series, value)
+            pipe.execute()
+        except RedisError:
+            with _totals_lock:
+                for series, value in totals.items():
+                    _totals[series] += value
+    finally:
+        _flush_lock.release()
+
+
+def _series_order(series):
+    name, _, labels = series.partition("{")
+    le = _LE.search(labels)
+    bound = float("inf") if le is None or le.group(1) == "+Inf" else float(le.group(1))
+    return _LE.sub("", labels), name, bound
+
+
+def render():
+    """All workers' totals in Prometheus text format; raises RedisError if Redis is down."""
+    flush()
+    values = get_redis().hgetall(METRICS_KEY)
+    lines = []
+    for family, (kind, help_text) in FAMILIES.items():
+        series = [s for s in values if s.partition("{")[0] in (family, f"{family}_bucket", f"{family}_sum", f"{family}_count")]
+        lines += [f"# HELP {family} {help_text}", f"# TYPE {family} {kind}"]
+        lines += [f"{s} {float(values[s])!r}" for s in sorted(series, key=_series_order)]
+    return "\n".join(lines) + "\n"
+
+
+def InstrumentationMiddleware(get_response):
+    """Time a sample of requests; outermost, so its wall time covers the other middleware."""
+    if settings.INSTRUMENTATION_SAMPLE_RATE <= 0:
+        return get_response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not _sampled():
+                return await get_response(request)
+            sample = Sample()
+            token = _current.set(sample)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            _record(request, response, sample)
+            if flush_due():
+                await sync_to_async(flush, thread_sensitive=False)()
+            return response
+
+        return markcoroutinefunction(middleware)
+
+    def middleware(request):
+        if not _sampled():
+            return get_response(request)
+        sample = Sample()
+        token = _current.set(sample)
+        try:
+            response = get_response(request)
+        finally:
+            _current.reset(token)
+        _record(request, response, sample)
+        if flush_due():
+            flush()
+        return response
+
+    return middleware
+
+
+InstrumentationMiddleware.sync_capable = True
+InstrumentationMiddleware.async_capable = True
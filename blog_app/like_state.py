@@ -0,0 +1,86 @@
+"""
+Per-post like state in Redis.
+
+Each published post has a Redis set of the user ids that liked it, so "did I like
+this?" is a SISMEMBER and "how many likes?" is an SCARD. Likes and unlikes write
+through to sets that are already materialized; missing sets are rebuilt from Postgres
+the first time they are read and expire after ``LIKE_STATE_TTL`` seconds, which also
+bounds any drift. Rebuilds are guarded against racing writes (see ``member_sets``).
+
+Drafts never get a set, since the set would answer every user: their state is read
+from Postgres and only for their author. A post that is unpublished or deleted has
+its set dropped with ``forget``.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from . import member_sets
+from .models import Like, Post
+from .redis_client import get_redis
+
+
+MAX_POSTS = 100
+
+
+def state_key(post_id):
+    return f"likes:post:{post_id}"
+
+
+def record_like(post_id, user_id):
+    member_sets.write(state_key(post_id), "SADD", user_id, settings.LIKE_STATE_TTL)
+
+
+def record_unlike(post_id, user_id):
+    member_sets.write(state_key(post_id), "SREM", user_id, settings.LIKE_STATE_TTL)
+
+
+def forget(post_id):
+    member_sets.forget(state_key(post_id), settings.LIKE_STATE_TTL)
+
+
+def _rebuild(client, post_ids, user_id):
+    """Read the states of the posts ``user_id`` may see from Postgres, materializing the published ones' sets."""
+    generations = dict(zip(post_ids, member_sets.generations(client, [state_key(p) for p in post_ids])))
+    visible = dict(
+        Post.objects.filter(id__in=post_ids)
+        .filter(Q(status="published") | Q(author__user_id=user_id))
+        .values_list("id", "status")
+    )
+    members = {post_id: set() for post_id in visible}
+    for post_id, liker_id in Like.objects.filter(post_id__in=visible).values_list("post_id", "user_id").iterator():
+        members[post_id].add(liker_id)
+    pipe = client.pipeline(transaction=False)
+    for post_id, likers in members.items():
+        if visible[post_id] == "published":
+            member_sets.install(pipe, state_key(post_id), generations[post_id], likers, settings.LIKE_STATE_TTL)
+    pipe.execute()
+    return {
+        post_id: {"liked_by_me": user_id in likers, "like_count": len(likers)}
+        for post_id, likers in members.items()
+    }
+
+
+def get_states(post_ids, user_id):
+    """
+    Return ``{post_id: {"liked_by_me": bool, "like_count": int}}`` for the posts
+    that exist and are visible to the user, in one Redis round trip when every set
+    is materialized.
+    """
+    client = get_redis()
+    post_ids = list(dict.fromkeys(post_ids))[:MAX_POSTS]
+
+    # SCARD is 0 only for a missing set, since materialized sets hold the marker
+    pipe = client.pipeline()
+    for post_id in post_ids:
+        pipe.sismember(state_key(post_id), user_id)
+        pipe.scard(state_key(post_id))
+    replies = pipe.execute()
+    states = {
+        post_id: {"liked_by_me": bool(replies[2 * i]), "like_count": replies[2 * i + 1] - 1}
+        for i, post_id in enumerate(post_ids)
+        if replies[2 * i + 1]
+    }
+    missing = [post_id for post_id in post_ids if post_id not in states]
+    if missing:
+        states.update(_rebuild(client, missing, user_id))
+    return states
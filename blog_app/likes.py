@@ -0,0 +1,58 @@
+"""
+Like and unlike as single SQL statements.
+
+Each statement checks that the post exists, writes or removes the like, and adjusts
+``Post.like_count``, so a request costs one round trip. The unique constraint on
+(post, user) makes concurrent double taps collapse into a single row.
+"""
+from django.db import connection
+
+from .models import Like, Post
+
+
+LIKE_SQL = f"""
+WITH target AS (
+    SELECT id FROM {Post._meta.db_table} WHERE id = %(post_id)s
+), inserted AS (
+    INSERT INTO {Like._meta.db_table} (post_id, user_id)
+    SELECT id, %(user_id)s FROM target
+    ON CONFLICT (post_id, user_id) DO NOTHING
+    RETURNING post_id
+), counted AS (
+    UPDATE {Post._meta.db_table} SET like_count = like_count + 1
+    WHERE id IN (SELECT post_id FROM inserted)
+    RETURNING id
+)
+SELECT EXISTS (SELECT 1 FROM target), EXISTS (SELECT 1 FROM counted)
+"""
+
+UNLIKE_SQL = f"""
+WITH target AS (
+    SELECT id FROM {Post._meta.db_table} WHERE id = %(post_id)s
+), deleted AS (
+    DELETE FROM {Like._meta.db_table}
+    WHERE post_id IN (SELECT id FROM target) AND user_id = %(user_id)s
+    RETURNING post_id
+), counted AS (
+    UPDATE {Post._meta.db_table} SET like_count = GREATEST(like_count - 1, 0)
+    WHERE id IN (SELECT post_id FROM deleted)
+    RETURNING id
+)
+SELECT EXISTS (SELECT 1 FROM target), EXISTS (SELECT 1 FROM counted)
+"""
+
+
+def _execute(sql, post_id, user_id):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"post_id": post_id, "user_id": user_id})
+        return cursor.fetchone()
+
+
+def like(post_id, user_id):
+    """Return ``(post_exists, liked)``; ``liked`` is False when the like was already there."""
+    return _execute(LIKE_SQL, post_id, user_id)
+
+
+def unlike(post_id, user_id):
+    """Return ``(post_exists, unliked)``; ``unliked`` is False when there was nothing to remove."""
+    return _execute(UNLIKE_SQL, post_id, user_id)
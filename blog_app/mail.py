@@ -0,0 +1,106 @@
+"""
+Mail delivery for Celery workers.
+
+Each worker process keeps one long-lived mail connection instead of opening a TLS
+SMTP session per email. The connection is health-checked with NOOP before reuse
+once it has been idle for a while, and reopened when the server has dropped it.
+Messages queued through ``enqueue`` are sent in batches with ``send_messages``.
+"""
+import json
+import time
+from smtplib import SMTPException, SMTPServerDisconnected
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from .redis_client import get_redis
+
+
+OUTBOX_KEY = "mail:outbox"
+
+_connection = None
+_last_used = 0.0
+
+
+def _healthy(connection):
+    smtp = getattr(connection, "connection", None)
+    if smtp is None:
+        # Non-SMTP backends (locmem, console) have nothing to check
+        return not hasattr(connection, "connection")
+    try:
+        return smtp.noop()[0] == 250
+    except (SMTPException, OSError):
+        return False
+
+
+def worker_connection():
+    global _connection, _last_used
+    now = time.monotonic()
+    if _connection is not None and now - _last_used > settings.EMAIL_HEALTH_CHECK_INTERVAL:
+        if not _healthy(_connection):
+            close_worker_connection()
+    if _connection is None:
+        _connection = get_connection()
+        _connection.open()
+    _last_used = now
+    return _connection
+
+
+def close_worker_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except (SMTPException, OSError):
+            pass
+        _connection = None
+
+
+@worker_process_init.connect
+def _reset_after_fork(**kwargs):
+    # A forked pool process must not share the parent's socket
+    global _connection
+    _connection = None
+
+
+@worker_process_shutdown.connect
+def _close_on_shutdown(**kwargs):
+    close_worker_connection()
+
+
+def send(messages):
+    """Send messages over the worker connection, reconnecting once if the server hung up."""
+    try:
+        return worker_connection().send_messages(messages) or 0
+    except SMTPServerDisconnected:
+        close_worker_connection()
+        return worker_connection().send_messages(messages) or 0
+
+
+def enqueue(subject, body, recipient, html=False):
+    get_redis().rpush(OUTBOX_KEY, json.dumps({
+        "subject": subject, "body": body, "to": [recipient], "html": html,
+    }))
+
+
+def flush_outbox(batch_size=100):
+    """Send everything waiting in the outbox, ``batch_size`` messages per ``send_messages`` call."""
+    client = get_redis()
+    sent = 0
+    while True:
+        payloads = client.lpop(OUTBOX_KEY, batch_size)
+        if not payloads:
+            return sent
+        messages = []
+        for payload in map(json.loads, payloads):
+            message = EmailMessage(payload["subject"], payload["body"], settings.DEFAULT_FROM_EMAIL, payload["to"])
+            if payload["html"]:
+                message.content_subtype = "html"
+            messages.append(message)
+        try:
+            sent += send(messages)
+        except (SMTPException, OSError):
+            # Put the batch back at the head of the outbox for the retry
+            client.lpush(OUTBOX_KEY, *reversed(payloads))
+            raise
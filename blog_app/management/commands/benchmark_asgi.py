@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from blog_app.management.loadtest import fetch_json, load, serve, summarize
+from blog_app.models import Author, Comment, Like, Post, Reader, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project under gunicorn (WSGI, sync views) and uvicorn (ASGI, async views) "
+        "with the same worker count, and compare requests/sec and latency at high concurrency."
+    )
+
+    # (label, sync path, async path); {post} is the seeded post id
+    ENDPOINTS = [
+        ("post_list", "/api/posts/", "/api/async/posts/"),
+        ("post_detail", "/api/posts/{post}/", "/api/async/posts/{post}/"),
+        ("comment_list", "/api/posts/{post}/comments", "/api/async/posts/{post}/comments"),
+        ("get_likes", "/api/posts/likes/{post}/", "/api/async/posts/likes/{post}/"),
+    ]
+
+    SERVERS = [
+        ("wsgi", "sync", ["gunicorn", "blog_project.wsgi:application", "--bind", "127.0.0.1:{port}", "--workers"]),
+        ("asgi", "async", ["uvicorn", "blog_project.asgi:application", "--port", "{port}", "--workers"]),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint.")
+        parser.add_argument(
+            "--concurrency", type=int, default=50,
+            help="Concurrent clients. Async views hold one DB connection per in-flight request.",
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Server processes for both servers.")
+        parser.add_argument("--rows", type=int, default=25, help="Comments and likes on the seeded post.")
+
+    def handle(self, *args, **options):
+        prefix = f"bench_asgi_{int(time.time())}"
+        post, token = self.seed(prefix, options["rows"])
+        try:
+            for server, flavour, command in self.SERVERS:
+                with serve(command + [str(options["workers"])]) as port:
+                    for label, sync_path, async_path in self.ENDPOINTS:
+                        path = (sync_path if flavour == "sync" else async_path).format(post=post.pk)
+                        fetch_json(port, path, token)  # warm the worker
+                        result = load(port, path, token, options["requests"], options["concurrency"])
+                        self.stdout.write(f"{server} {label:<13} {summarize(*result)}")
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def seed(self, prefix, rows):
+        author = Author.objects.create(user=User.objects.create(username=f"{prefix}_author", role="author"), bio="")
+        reader_user = User.objects.create(username=f"{prefix}_reader", role="reader")
+        Reader.objects.create(user=reader_user)
+        users = User.objects.bulk_create([User(username=f"{prefix}_{i}") for i in range(rows)])
+        post = Post.objects.create(author=author, title="Benchmark", content="Body", status="published")
+        Comment.objects.bulk_create([Comment(post=post, user=u, content="Comment") for u in users])
+        Like.objects.bulk_create([Like(post=post, user=u) for u in users])
+        return post, str(AccessToken.for_user(reader_user))
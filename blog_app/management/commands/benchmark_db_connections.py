@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from blog_app.management.loadtest import fetch_json, load, serve, summarize
+from blog_app.models import Author, Post, Reader, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project under threaded gunicorn once per DATABASE_CONN_MODE and compare "
+        "latency on a database-bound endpoint, with the connection metrics of each run."
+    )
+
+    MODES = ["close", "persistent", "pool"]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default=",".join(self.MODES), help="Comma-separated connection modes.")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=8, help="Gunicorn threads per worker.")
+        parser.add_argument("--pool-size", type=int, default=4, help="Pool max size per worker in pool mode.")
+
+    def handle(self, *args, **options):
+        prefix = f"bench_conn_{int(time.time())}"
+        author = Author.objects.create(user=User.objects.create(username=f"{prefix}_author", role="author"), bio="")
+        reader_user = User.objects.create(username=f"{prefix}_reader", role="reader")
+        Reader.objects.create(user=reader_user)
+        admin_user = User.objects.create(username=f"{prefix}_admin", is_staff=True)
+        posts = Post.objects.bulk_create([
+            Post(author=author, title=f"Post {i}", content="Body", status="published") for i in range(50)
+        ])
+        token, admin_token = str(AccessToken.for_user(reader_user)), str(AccessToken.for_user(admin_user))
+        # Distinct posts defeat the response cache, so every request reaches Postgres
+        paths = [f"/api/posts/{post.pk}/?conn_bench={i}" for i, post in enumerate(posts)]
+
+        command = [
+            "gunicorn", "blog_project.wsgi:application", "--bind", "127.0.0.1:{port}",
+            "--workers", str(options["workers"]), "--threads", str(options["threads"]),
+        ]
+        try:
+            for mode in options["modes"].split(","):
+                env = {"DATABASE_CONN_MODE": mode, "DATABASE_POOL_MAX_SIZE": str(options["pool_size"])}
+                with serve(command, env) as port:
+                    fetch_json(port, paths[0], token)
+                    result = load(port, paths, token, options["requests"], options["concurrency"])
+                    self.stdout.write(f"{mode:<11} {summarize(*result)}")
+                    # Metrics come from whichever worker answers, so they cover that process only
+                    status, metrics = fetch_json(port, "/api/metrics/db/", admin_token)
+                    if status == 200:
+                        details = ", ".join(f"{key}={value}" for key, value in metrics["default"].items())
+                        self.stdout.write(f"{'':<11} {details}")
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
@@ -0,0 +1,391 @@
+import itertools
+import json
+import secrets
+import subprocess
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from blog_app import comment_digest, counters, feed, follows, like_state, member_sets, response_cache, urls
+from blog_app.management.loadtest import percentile, summarize
+from blog_app.models import Author, Comment, Follow, Like, Post, Reader, Tag, User
+from blog_app.redis_client import get_redis
+from blog_project.celery import app
+
+
+# One request: url kwargs, acting user (None for anonymous), body or query params, and
+# extra headers for requests that do not authenticate with a user's JWT
+Call = namedtuple("Call", "kwargs user data content_type headers", defaults=(None, None, None, None))
+
+PASSWORD = "benchmark-password"
+HOT = 100
+
+
+def pair(targets, actors, i):
+    """The i-th distinct (target, actor) pair, so likes and follows never repeat within a run."""
+    return targets[i % len(targets)], actors[i // len(targets) % len(actors)]
+
+
+def like_call(f, i):
+    post, user = pair(f.hot_post_list, f.actors, i)
+    return Call({"post_id": post}, user)
+
+
+def follow_call(f, i):
+    author, user = pair(f.hot_author_list, f.actors, i)
+    return Call({"author_id": author}, user)
+
+
+def ndjson_posts(count):
+    return "".join(
+        json.dumps({"title": f"Imported {i}", "content": "Body", "status": "draft", "tags": []}) + "\n"
+        for i in range(count)
+    ).encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every URL in blog_app/urls.py in-process at a fixed concurrency against the "
+        "dataset from seed_data, and report p50/p95/p99 latency, throughput and SQL queries "
+        "per request. Writes come from throwaway users that are deleted afterwards. Results "
+        "are saved as JSON; pass an earlier file to --compare to print the differences. "
+        "Without a reachable Celery broker, pass --eager-tasks."
+    )
+
+    # (label, url name, method, f, i -> Call); reads first, each write before its undo
+    ENDPOINTS = [
+        ("author_list", "author_list", "get", lambda f, i: Call({}, f.author_user)),
+        ("author_detail", "author_detail", "get", lambda f, i: Call({"pk": f.author.pk}, f.author_user)),
+        ("author_export", "author_export", "get",
+         lambda f, i: Call({"pk": f.prolific.pk, "dataset": "posts", "fmt": "ndjson"}, f.prolific.user)),
+        ("reader_list", "reader_list", "get", lambda f, i: Call({}, f.reader_user)),
+        ("reader_detail", "reader_detail", "get", lambda f, i: Call({"pk": f.reader.pk}, f.reader_user)),
+        ("tag_list", "tag_list", "get", lambda f, i: Call({}, f.reader_user)),
+        ("tag_detail", "tag_detail", "get", lambda f, i: Call({"pk": f.tag.pk}, f.reader_user)),
+        ("post_list (page)", "post_list", "get", lambda f, i: Call({}, f.reader_user)),
+        ("post_list (cursor)", "post_list", "get", lambda f, i: Call({}, f.reader_user, {"pagination": "cursor"})),
+        ("post_list (search)", "post_list", "get", lambda f, i: Call({}, f.reader_user, {"search": "postgres"})),
+        ("post_list (author)", "post_list", "get", lambda f, i: Call({}, f.prolific.user)),
+        ("post_detail", "post_detail", "get", lambda f, i: Call({"pk": f.post.pk}, f.reader_user)),
+        ("comment_list_create", "comment_list_create", "get", lambda f, i: Call({"post_pk": f.post.pk}, f.reader_user)),
+        ("comment_detail", "comment_detail", "get",
+         lambda f, i: Call({"post_pk": f.post.pk, "comment_pk": f.comment.pk}, f.reader_user)),
+        ("get_likes", "get_likes", "get", lambda f, i: Call({"post_id": f.post.pk}, f.reader_user)),
+        ("like_states", "like_states", "get", lambda f, i: Call({}, f.reader_user, {"ids": f.hot_post_ids})),
+        ("get_author_followers", "get_author_followers", "get",
+         lambda f, i: Call({"author_id": f.author.pk}, f.reader_user)),
+        ("following_states", "following_states", "get", lambda f, i: Call({}, f.reader_user, {"ids": f.hot_author_ids})),
+        ("home_feed", "home_feed", "get", lambda f, i: Call({}, f.reader_user)),
+        ("db_connection_metrics", "db_connection_metrics", "get", lambda f, i: Call({}, f.admin)),
+        ("prometheus_metrics", "prometheus_metrics", "get",
+         lambda f, i: Call({}, None, headers={"HTTP_AUTHORIZATION": f"Bearer {settings.METRICS_TOKEN}"})),
+        ("async_post_list", "async_post_list", "get", lambda f, i: Call({}, f.reader_user)),
+        ("async_post_detail", "async_post_detail", "get", lambda f, i: Call({"pk": f.post.pk}, f.reader_user)),
+        ("async_comment_list", "async_comment_list", "get", lambda f, i: Call({"post_pk": f.post.pk}, f.reader_user)),
+        ("async_get_likes", "async_get_likes", "get", lambda f, i: Call({"post_id": f.post.pk}, f.reader_user)),
+        ("token_refresh", "token_refresh", "post", lambda f, i: Call({}, None, {"refresh": f.refresh})),
+        ("tag_list (create)", "tag_list", "post", lambda f, i: Call({}, f.owner, {"name": f"{f.prefix}_tag_{i}"})),
+        ("tag_detail (update)", "tag_detail", "put",
+         lambda f, i: Call({"pk": f.own_tag.pk}, f.owner, {"name": f"{f.prefix}_own_tag_{i}"})),
+        ("post_create", "post_create", "post", lambda f, i: Call({}, f.owner, {
+            "title": f"Benchmark {i}", "content": "Body", "status": "published", "tags": [str(f.tag.pk)],
+        })),
+        ("post_import", "post_import", "post", lambda f, i: Call({}, f.owner, ndjson_posts(10), "application/x-ndjson")),
+        ("post_detail (update)", "post_detail", "put", lambda f, i: Call({"pk": f.own_post.pk}, f.owner, {
+            "title": f"Benchmark post {i}", "content": "Body", "status": "published", "tags": [str(f.tag.pk)],
+        })),
+        ("comment_list_create (create)", "comment_list_create", "post",
+         lambda f, i: Call({"post_pk": f.post.pk}, f.actors[i % len(f.actors)], {"post": f.post.pk, "content": f"Comment {i}"})),
+        ("author_detail (update)", "author_detail", "put",
+         lambda f, i: Call({"pk": f.owner_author.pk}, f.owner, {"bio": f"Bio {i}"})),
+        ("reader_detail (update)", "reader_detail", "put",
+         lambda f, i: Call({"pk": f.actor_readers[0].pk}, f.actors[0], {})),
+        ("comment_detail (update)", "comment_detail", "put", lambda f, i: Call(
+            {"post_pk": f.post.pk, "comment_pk": f.own_comment.pk}, f.actors[0], {"post": f.post.pk, "content": f"Edited {i}"},
+        )),
+        ("like_post", "like_post", "post", like_call),
+        ("unlike_post", "unlike_post", "delete", like_call),
+        ("follow_author", "follow_author", "post", follow_call),
+        ("unfollow_author", "unfollow_author", "delete", follow_call),
+        ("password_reset", "password_reset", "post",
+         lambda f, i: Call({}, None, {"email": f.actors[i % len(f.actors)].email})),
+        # These hash a password on every request
+        ("token_obtain_pair", "token_obtain_pair", "post",
+         lambda f, i: Call({}, None, {"username": f.actors[i % len(f.actors)].username, "password": PASSWORD})),
+        ("register", "register", "post", lambda f, i: Call({}, None, {
+            "username": f"{f.prefix}_registered_{i}", "email": f"{f.prefix}_registered_{i}@example.com",
+            "password": PASSWORD, "role": "reader",
+        })),
+        ("password_reset_confirm", "password_reset_confirm", "post", lambda f, i: Call(
+            f.reset_links[i % len(f.reset_links)], None, {"new_password": PASSWORD},
+        )),
+    ]
+    SLOW = {"token_obtain_pair", "register", "password_reset_confirm"}
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint.")
+        parser.add_argument(
+            "--slow-requests", type=int, default=20,
+            help="Requests for the endpoints that hash passwords; at most --actors for password_reset_confirm.",
+        )
+        parser.add_argument("--concurrency", type=int, default=8, help="Client threads, each with its own connection.")
+        parser.add_argument("--actors", type=int, default=50, help="Throwaway readers that make the writes.")
+        parser.add_argument("--only", nargs="+", metavar="LABEL", help="Benchmark only these endpoint labels.")
+        parser.add_argument("--output", help="JSON results file (default: endpoint-benchmark-<timestamp>.json).")
+        parser.add_argument("--compare", metavar="JSON", help="Earlier results to compare against.")
+        parser.add_argument(
+            "--eager-tasks", action="store_true",
+            help="Run Celery tasks inline with the in-memory email backend; their cost counts toward the request.",
+        )
+        parser.add_argument("--throttle", action="store_true", help="Keep write throttling on.")
+
+    def handle(self, *args, **options):
+        for name in ("requests", "slow_requests", "concurrency", "actors"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        endpoints = self.ENDPOINTS
+        if options["only"]:
+            endpoints = [e for e in endpoints if e[0] in options["only"]]
+            unknown = set(options["only"]) - {e[0] for e in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoint labels: {', '.join(sorted(unknown))}")
+        else:
+            uncovered = {p.name for p in urls.urlpatterns} - {e[1] for e in self.ENDPOINTS}
+            if uncovered:
+                self.stderr.write(f"Not benchmarked: {', '.join(sorted(uncovered))}")
+
+        started = datetime.now(timezone.utc)
+        prefix = f"bench_endpoints_{int(time.time())}"
+        # /metrics refuses every request while no token is configured
+        overrides = {"METRICS_TOKEN": settings.METRICS_TOKEN or secrets.token_urlsafe()}
+        if options["eager_tasks"]:
+            app.conf.task_always_eager = True
+            overrides["EMAIL_BACKEND"] = "django.core.mail.backends.locmem.EmailBackend"
+        if not options["throttle"]:
+            # The writes would mostly measure 429s otherwise
+            overrides["THROTTLE_BUCKETS"] = {}
+        results = []
+        fixtures = None
+        try:
+            with override_settings(**overrides):
+                fixtures = self.setup(prefix, options["actors"])
+                for label, url_name, method, build in endpoints:
+                    total = options["slow_requests"] if url_name in self.SLOW else options["requests"]
+                    if url_name == "password_reset_confirm":
+                        total = min(total, options["actors"])
+                    result, samples = self.run(fixtures, url_name, method, build, total, options["concurrency"])
+                    results.append({"label": label, "url_name": url_name, "method": method.upper(), **result})
+                    self.report(results[-1], *samples)
+        finally:
+            app.conf.task_always_eager = False
+            # Also after a failed setup, which may have created some of the throwaway rows
+            self.cleanup(prefix, fixtures)
+
+        output = options["output"] or f"endpoint-benchmark-{started:%Y%m%dT%H%M%S}.json"
+        with open(output, "w") as f:
+            json.dump({
+                "started_at": started.isoformat(),
+                "commit": self.commit(),
+                "options": {k: options[k] for k in ("requests", "slow_requests", "concurrency", "actors", "eager_tasks", "throttle")},
+                "dataset": {model.__name__: model.objects.count() for model in (User, Author, Reader, Tag, Post, Comment, Like, Follow)},
+                "endpoints": results,
+            }, f, indent=2)
+        self.stdout.write(f"Results written to {output}")
+
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def setup(self, prefix, actor_count):
+        hot_posts = list(Post.objects.filter(status="published").order_by("-like_count", "-id")[:HOT])
+        hot_authors = list(Author.objects.order_by("-follower_count", "id")[:HOT])
+        if not hot_posts or not hot_authors:
+            raise CommandError("No published posts or authors to benchmark; run seed_data first")
+        reader = Reader.objects.select_related("user").annotate(n=Count("follows")).order_by("-n", "id").first()
+        if reader is None:
+            raise CommandError("No readers to benchmark; run seed_data first")
+        prolific = Author.objects.select_related("user").annotate(n=Count("posts")).order_by("-n", "id").first()
+        tag = Tag.objects.annotate(n=Count("posts")).order_by("-n", "id").first() or Tag.objects.create(name=f"{prefix}_tag")
+
+        password = make_password(PASSWORD)
+        owner = User.objects.create(username=f"{prefix}_author", role="author", password=password)
+        owner_author = Author.objects.create(user=owner, bio="")
+        admin = User.objects.create(username=f"{prefix}_admin", is_staff=True, password=password)
+        actors = User.objects.bulk_create([
+            User(username=f"{prefix}_reader_{i}", email=f"{prefix}_reader_{i}@example.com", role="reader", password=password)
+            for i in range(actor_count)
+        ])
+        actor_readers = Reader.objects.bulk_create([Reader(user=user) for user in actors])
+        post = hot_posts[0]
+        own_comment = Comment.objects.create(post=post, user=actors[0], content="Benchmark comment")
+
+        return SimpleNamespace(
+            prefix=prefix,
+            post=post,
+            comment=Comment.objects.filter(post=post).exclude(pk=own_comment.pk).first() or own_comment,
+            hot_post_list=[p.pk for p in hot_posts],
+            hot_post_ids=",".join(str(p.pk) for p in hot_posts),
+            author=hot_authors[0],
+            author_user=hot_authors[0].user,
+            hot_author_list=[a.pk for a in hot_authors],
+            hot_author_ids=",".join(str(a.pk) for a in hot_authors),
+            reader=reader,
+            reader_user=reader.user,
+            prolific=prolific,
+            tag=tag,
+            owner=owner,
+            owner_author=owner_author,
+            own_post=Post.objects.create(author=owner_author, title="Benchmark post", content="Body", status="published"),
+            own_tag=Tag.objects.create(name=f"{prefix}_own_tag"),
+            own_comment=own_comment,
+            admin=admin,
+            actors=actors,
+            actor_readers=actor_readers,
+            refresh=str(RefreshToken.for_user(actors[0])),
+            reset_links=[
+                {"uidb64": urlsafe_base64_encode(force_bytes(user.pk)), "token": default_token_generator.make_token(user)}
+                for user in actors
+            ],
+            tokens={},
+        )
+
+    def token(self, fixtures, user):
+        # Threads may race to fill this in; either token is valid
+        if user.pk not in fixtures.tokens:
+            fixtures.tokens[user.pk] = str(AccessToken.for_user(user))
+        return fixtures.tokens[user.pk]
+
+    def run(self, fixtures, url_name, method, build, total, concurrency):
+        """Send ``total`` requests from ``concurrency`` threads, each with its own DB connection.
+
+        Returns the JSON summary and the raw (seconds, timings, status codes) samples.
+        """
+        indexes = itertools.count()
+        samples = []
+
+        def worker():
+            client = APIClient()
+            try:
+                while (i := next(indexes)) < total:
+                    call = build(fixtures, i)
+                    url = reverse(url_name, kwargs=call.kwargs)
+                    headers = dict(call.headers or {})
+                    if call.user:
+                        headers["HTTP_AUTHORIZATION"] = f"Bearer {self.token(fixtures, call.user)}"
+                    if method == "get":
+                        send = lambda: client.get(url, call.data, **headers)
+                    elif call.content_type:
+                        send = lambda: getattr(client, method)(url, call.data, content_type=call.content_type, **headers)
+                    else:
+                        send = lambda: getattr(client, method)(url, call.data, format="json", **headers)
+
+                    with ExitStack() as stack:
+                        captures = [stack.enter_context(CaptureQueriesContext(connections[a])) for a in connections]
+                        start = time.perf_counter()
+                        response = send()
+                        if response.streaming:
+                            b"".join(response.streaming_content)
+                        elapsed = time.perf_counter() - start
+                    samples.append((elapsed, sum(len(c) for c in captures), response.status_code))
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        timings = [s[0] for s in samples]
+        queries = [s[1] for s in samples]
+        codes = [s[2] for s in samples]
+        result = {
+            "requests": len(samples),
+            "concurrency": concurrency,
+            "seconds": round(elapsed, 3),
+            "throughput": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+            "queries_mean": round(sum(queries) / len(queries), 2),
+            "queries_max": max(queries),
+            "statuses": {str(code): n for code, n in sorted(Counter(codes).items())},
+        }
+        return result, (elapsed, timings, codes)
+
+    def report(self, result, elapsed, timings, codes):
+        self.stdout.write(
+            f"{result['method']:<6} {result['label']:<30} {summarize(elapsed, timings, codes)} "
+            f"{result['queries_mean']:.1f} queries (max {result['queries_max']})"
+        )
+
+    def compare(self, path, results):
+        with open(path) as f:
+            baseline = {e["label"]: e for e in json.load(f)["endpoints"]}
+        self.stdout.write(f"\nCompared with {path}:")
+        for result in results:
+            before = baseline.get(result["label"])
+            if before is None:
+                continue
+            change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(
+                f"{result['label']:<30} p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f}ms ({change:+.0f}%) "
+                f"throughput {before['throughput']:.0f} -> {result['throughput']:.0f}/s "
+                f"queries {before['queries_mean']:.1f} -> {result['queries_mean']:.1f}"
+            ))
+
+    def cleanup(self, prefix, fixtures):
+        """Delete the throwaway users and everything they wrote, then repair what the cascade skipped."""
+        if fixtures is None:
+            # Setup failed part way, before any request ran, so only its own rows can exist
+            User.objects.filter(username__startswith=prefix).delete()
+            Tag.objects.filter(name__startswith=prefix).delete()
+            return
+
+        post_ids = fixtures.hot_post_list
+        author_ids = fixtures.hot_author_list
+        reader_ids = [reader.pk for reader in fixtures.actor_readers]
+        # Their digest counts would otherwise mail the post's real author about deleted comments
+        comments = Comment.objects.filter(post=fixtures.post, user__in=fixtures.actors).exclude(pk=fixtures.own_comment.pk)
+        comment_digest.retract(fixtures.post.author_id, fixtures.post.pk, comments.count())
+        User.objects.filter(username__startswith=prefix).delete()
+        Tag.objects.filter(name__startswith=prefix).delete()
+
+        # Cascading deletes bypass the counters and the Redis write-through
+        Post.objects.filter(pk__in=post_ids).update(
+            like_count=counters.actual_count(Post, "like_count"),
+            comment_count=counters.actual_count(Post, "comment_count"),
+        )
+        Author.objects.filter(pk__in=author_ids).update(follower_count=counters.actual_count(Author, "follower_count"))
+        for post_id in post_ids:
+            response_cache.bump(post_id)
+        client = get_redis()
+        like_keys = [like_state.state_key(post_id) for post_id in post_ids]
+        client.delete(*like_keys, *[member_sets.generation_key(key) for key in like_keys])
+        client.delete(*follows.graph_keys(reader_ids, author_ids), *[feed.timeline_key(r) for r in reader_ids])
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,82 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app import feed
+from blog_app.models import Author, Follow, Post, Reader, User
+from blog_app.redis_client import get_redis
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare Redis timeline feed reads against the equivalent SQL join over Follow -> Post."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", type=int, default=500)
+        parser.add_argument("--readers", type=int, default=2000)
+        parser.add_argument("--follows-per-reader", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--samples", type=int, default=200)
+        parser.add_argument("--limit", type=int, default=10)
+
+    def handle(self, *args, **options):
+        readers = []
+        try:
+            with transaction.atomic():
+                readers = self.seed(options)
+                sample = random.sample(readers, k=min(options["samples"], len(readers)))
+                limit = options["limit"]
+
+                cold = self.time_each(sample, lambda r: feed.get_feed_page(r.id, limit))
+                warm = self.time_each(sample, lambda r: feed.get_feed_page(r.id, limit))
+                sql = self.time_each(sample, lambda r: list(
+                    Post.objects.filter(author__followers__reader=r, status="published")
+                    .order_by("-created_at", "-id")
+                    .values_list("id", flat=True)[:limit]
+                ))
+                for label, timings in (("redis (cold)", cold), ("redis (warm)", warm), ("sql join", sql)):
+                    self.stdout.write(
+                        f"{label:<14} p50={percentile(timings, 50):.2f}ms "
+                        f"p95={percentile(timings, 95):.2f}ms p99={percentile(timings, 99):.2f}ms"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if readers:
+                get_redis().delete(*[feed.timeline_key(r.id) for r in readers])
+
+    def time_each(self, readers, fn):
+        timings = []
+        for reader in readers:
+            start = time.perf_counter()
+            fn(reader)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def seed(self, options):
+        users = User.objects.bulk_create(
+            [User(username=f"feed_author_{i}", role="author") for i in range(options["authors"])]
+            + [User(username=f"feed_reader_{i}", role="reader") for i in range(options["readers"])]
+        )
+        authors = Author.objects.bulk_create([Author(user=u, bio="") for u in users[:options["authors"]]])
+        readers = Reader.objects.bulk_create([Reader(user=u) for u in users[options["authors"]:]])
+        k = min(options["follows_per_reader"], len(authors))
+        Follow.objects.bulk_create([
+            Follow(reader=reader, author=author) for reader in readers for author in random.sample(authors, k=k)
+        ], batch_size=5000)
+        Post.objects.bulk_create([
+            Post(author=random.choice(authors), title=f"Post {i}", content="", status="published")
+            for i in range(options["posts"])
+        ], batch_size=5000)
+        return readers
@@ -0,0 +1,112 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog_app import follows
+from blog_app.models import Author, Follow, Reader, User
+from blog_app.redis_client import get_redis
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a follow graph (1M edges by default) in a rolled-back transaction and report "
+        "follow, unfollow, is_following and follower listing latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", type=int, default=100)
+        parser.add_argument("--readers", type=int, default=10000, help="Every reader follows every author.")
+        parser.add_argument("--samples", type=int, default=200)
+
+    def handle(self, *args, **options):
+        authors, readers = [], []
+        try:
+            with transaction.atomic():
+                authors, readers = self.seed(options["authors"], options["readers"])
+                edges = Follow.objects.count()
+                self.stdout.write(f"{edges} follow edges")
+                self.measure(authors, random.sample(readers, k=min(options["samples"], len(readers))))
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if readers:
+                keys = follows.graph_keys([r.id for r in readers], [a.id for a in authors])
+                for i in range(0, len(keys), 1000):
+                    get_redis().delete(*keys[i:i + 1000])
+
+    def measure(self, authors, readers):
+        client = APIClient()
+        spare = Author.objects.create(user=User.objects.create(username="graph_spare", role="author"), bio="")
+        author_ids = ",".join(str(a.id) for a in authors)
+        followers_url = reverse("get_author_followers", kwargs={"author_id": authors[0].id})
+
+        timings = {label: [] for label in (
+            "follow", "unfollow", "is_following (cold)", "is_following (warm)", "followers page 1", "followers page 50",
+        )}
+
+        # Walk once to the 50th page (or the last one) so every sample can request it directly
+        client.force_authenticate(readers[0].user)
+        deep_url = client.get(followers_url, {"page_size": 20}).json()["next"] or followers_url
+        for _ in range(48):
+            next_url = client.get(deep_url).json()["next"]
+            if next_url is None:
+                break
+            deep_url = next_url
+
+        def timed(label, send):
+            start = time.perf_counter()
+            response = send()
+            timings[label].append(time.perf_counter() - start)
+            return response
+
+        for reader in readers:
+            client.force_authenticate(reader.user)
+            timed("is_following (cold)", lambda: client.get(reverse("following_states"), {"ids": author_ids}))
+            timed("is_following (warm)", lambda: client.get(reverse("following_states"), {"ids": author_ids}))
+            timed("follow", lambda: client.post(reverse("follow_author", kwargs={"author_id": spare.id})))
+            timed("unfollow", lambda: client.delete(reverse("unfollow_author", kwargs={"author_id": spare.id})))
+
+            timed("followers page 1", lambda: client.get(followers_url, {"page_size": 20}))
+            timed("followers page 50", lambda: client.get(deep_url))
+
+        for label, samples in timings.items():
+            self.stdout.write(
+                f"{label:<20} p50={percentile(samples, 50):.2f}ms "
+                f"p95={percentile(samples, 95):.2f}ms p99={percentile(samples, 99):.2f}ms"
+            )
+
+    def seed(self, author_count, reader_count):
+        users = User.objects.bulk_create(
+            [User(username=f"graph_author_{i}", role="author") for i in range(author_count)]
+            + [User(username=f"graph_reader_{i}", role="reader") for i in range(reader_count)],
+            batch_size=5000,
+        )
+        authors = Author.objects.bulk_create([Author(user=u, bio="") for u in users[:author_count]])
+        readers = Reader.objects.bulk_create([Reader(user=u) for u in users[author_count:]], batch_size=5000)
+        # A set-based insert: a million edges is too many to build as model instances
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Follow._meta.db_table} (reader_id, author_id, created_at)
+                SELECT r, a, NOW() - random() * INTERVAL '365 days'
+                FROM unnest(%s::bigint[]) AS r, unnest(%s::bigint[]) AS a
+                """,
+                [[r.id for r in readers], [a.id for a in authors]],
+            )
+            cursor.execute(f"ANALYZE {Follow._meta.db_table}")
+        Author.objects.filter(id__in=[a.id for a in authors]).update(follower_count=reader_count)
+        return authors, readers
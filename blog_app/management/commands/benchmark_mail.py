@@ -0,0 +1,113 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from blog_app import mail
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib, with an artificial round trip per command."""
+
+    def reply(self, line):
+        time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stub ESMTP")
+        while line := self.rfile.readline():
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-stub\r\n250 SIZE 10485760")
+            elif command == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 OK")
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.latency = latency
+        self.connections = 0
+        self.messages = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one SMTP connection per email against the pooled worker connection "
+        "with batched send_messages, using a local stub SMTP server or the locmem backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=500)
+        parser.add_argument("--batch", type=int, default=50, help="Messages per send_messages call.")
+        parser.add_argument("--latency", type=float, default=2.0, help="Stub server delay per SMTP reply, in ms.")
+        parser.add_argument("--backend", choices=["stub", "locmem"], default="stub")
+
+    def handle(self, *args, **options):
+        total, batch_size = options["messages"], options["batch"]
+        messages = [
+            EmailMessage("Benchmark", f"Message {i}", "bench@example.com", [f"reader{i}@example.com"])
+            for i in range(total)
+        ]
+
+        server = None
+        if options["backend"] == "stub":
+            server = StubSMTPServer(options["latency"] / 1000)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            overrides = {
+                "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+                "EMAIL_HOST": "127.0.0.1",
+                "EMAIL_PORT": server.server_address[1],
+                "EMAIL_USE_TLS": False,
+                "EMAIL_HOST_USER": "",
+                "EMAIL_HOST_PASSWORD": "",
+            }
+        else:
+            overrides = {"EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend"}
+
+        try:
+            with override_settings(**overrides):
+                results = [
+                    ("per message", self.time(server, lambda: [get_connection().send_messages([m]) for m in messages])),
+                    ("pooled", self.time(server, lambda: [
+                        mail.send(messages[i:i + batch_size]) for i in range(0, total, batch_size)
+                    ])),
+                ]
+                mail.close_worker_connection()
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        for label, (elapsed, connections, delivered) in results:
+            if server is not None and delivered != total:
+                raise CommandError(f"{label}: stub server received {delivered} of {total} messages")
+            detail = f", {connections} connections" if server is not None else ""
+            self.stdout.write(f"{label:<12} {total} emails in {elapsed:.2f}s ({total / elapsed:.0f}/s{detail})")
+        speedup = results[0][1][0] / results[1][1][0]
+        self.stdout.write(self.style.SUCCESS(f"Pooled speedup: {speedup:.1f}x"))
+
+    def time(self, server, send):
+        before = (server.connections, server.messages) if server else (0, 0)
+        mail.close_worker_connection()
+        start = time.perf_counter()
+        send()
+        elapsed = time.perf_counter() - start
+        after = (server.connections, server.messages) if server else (0, 0)
+        return elapsed, after[0] - before[0], after[1] - before[1]
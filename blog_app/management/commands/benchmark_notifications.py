@@ -0,0 +1,73 @@
+import time
+
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from blog_app.models import Author, Follow, Post, Reader, User
+from blog_app.redis_client import get_redis
+from blog_app.tasks import notify_readers_of_new_post
+from blog_project.celery import app
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan a new-post notification out to a large seeded follower set with the eager "
+        "Celery broker and the in-memory email backend, and report deliveries per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--followers", type=int, default=100000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        app.conf.task_always_eager = True
+        post_id = None
+        try:
+            with override_settings(
+                EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                NOTIFY_CHUNK_SIZE=options["chunk_size"],
+            ), transaction.atomic():
+                post = self.seed(options["followers"])
+                post_id = post.id
+                mail.outbox = []
+                start = time.perf_counter()
+                chunks = notify_readers_of_new_post.delay(post.author_id, post.id).get()
+                elapsed = time.perf_counter() - start
+
+                delivered = len(mail.outbox)
+                if delivered != options["followers"]:
+                    raise CommandError(f"Expected {options['followers']} emails, {delivered} were sent")
+                self.stdout.write(
+                    f"{delivered} notifications in {chunks} chunks, {elapsed:.2f}s "
+                    f"({delivered / elapsed:.0f}/s)"
+                )
+
+                mail.outbox = []
+                notify_readers_of_new_post.delay(post.author_id, post.id).get()
+                self.stdout.write(f"Re-running the fan-out resent {len(mail.outbox)} notifications")
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            app.conf.task_always_eager = False
+            if post_id is not None:
+                client = get_redis()
+                keys = list(client.scan_iter(f"notify:post:{post_id}:*"))
+                if keys:
+                    client.delete(*keys)
+
+    def seed(self, followers):
+        author_user = User.objects.create(username="notify_bench_author", role="author")
+        author = Author.objects.create(user=author_user, bio="")
+        users = User.objects.bulk_create([
+            User(username=f"notify_bench_{i}", email=f"reader{i}@example.com") for i in range(followers)
+        ], batch_size=5000)
+        readers = Reader.objects.bulk_create([Reader(user=user) for user in users], batch_size=5000)
+        Follow.objects.bulk_create([Follow(reader=reader, author=author) for reader in readers], batch_size=5000)
+        return Post.objects.create(author=author, title="Benchmark", content="Body", status="published")
@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app.models import Author, Post, Tag, User
+from blog_app.search import SEARCH_MODES, search_posts, update_search_vector
+
+
+WORDS = (
+    "django postgres python redis celery search index query vector cache latency "
+    "throughput database server client request response token author reader post "
+    "comment like follow feed timeline worker queue schema migration benchmark"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Seed a large post corpus and compare full-text search against icontains scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=200000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--query", action="append", dest="queries")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded corpus afterwards.")
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or ["postgres", "redis cache", "timeline worker"]
+        user = User.objects.create(username=f"bench_search_{int(time.time())}", role="author")
+        author = Author.objects.create(user=user, bio="")
+        try:
+            self.seed(author, options["posts"], options["batch_size"])
+            posts = Post.objects.filter(status="published")
+            for mode in SEARCH_MODES:
+                for query in queries:
+                    timings = []
+                    for _ in range(options["repeat"]):
+                        start = time.perf_counter()
+                        list(search_posts(posts, query, mode)[:10])
+                        timings.append(time.perf_counter() - start)
+                    timings.sort()
+                    self.stdout.write(
+                        f"{mode:<10} {query!r:<20} "
+                        f"min={timings[0] * 1000:.1f}ms median={timings[len(timings) // 2] * 1000:.1f}ms"
+                    )
+        finally:
+            if not options["keep"]:
+                user.delete()
+
+    def seed(self, author, total, batch_size):
+        tags = [Tag.objects.get_or_create(name=f"bench-{word}")[0] for word in WORDS[:10]]
+        through = Post.tags.through
+        start = time.perf_counter()
+        created = 0
+        while created < total:
+            size = min(batch_size, total - created)
+            with transaction.atomic():
+                posts = Post.objects.bulk_create([
+                    Post(
+                        author=author,
+                        title=" ".join(random.choices(WORDS, k=6)),
+                        content=" ".join(random.choices(WORDS, k=200)),
+                        status="published",
+                    )
+                    for _ in range(size)
+                ])
+                through.objects.bulk_create([
+                    through(post_id=post.id, tag_id=random.choice(tags).id) for post in posts
+                ])
+                update_search_vector([post.id for post in posts])
+            created += size
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Seeded {total} posts in {elapsed:.1f}s")
@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog_app.export import DATASETS, FORMATS, encode, rows
+
+
+class Command(BaseCommand):
+    help = "Stream a dataset (posts, comments, likes, followers) to NDJSON or CSV for offline dumps."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+        parser.add_argument("--author", type=int, help="Only export rows belonging to this author id.")
+        parser.add_argument("--output", default="-", help="Output file, or - for stdout.")
+
+    def handle(self, *args, **options):
+        fields, values = rows(options["dataset"], options["author"])
+        output = sys.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8", newline="")
+        try:
+            for chunk in encode(options["format"], fields, values):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_app.importer import AuthorMap, import_posts
+from blog_app.models import Author
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream posts from an NDJSON file (one object per line with title, content, "
+        "status, tags and author) into the database in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--author", help="Username used for lines without an author field.")
+        parser.add_argument("--no-notify", action="store_true", help="Skip the per-author digest notifications.")
+
+    def handle(self, *args, **options):
+        default = None
+        if options["author"]:
+            default = Author.objects.filter(user__username=options["author"]).values_list("pk", flat=True).first()
+            if default is None:
+                raise CommandError(f"Unknown author {options['author']!r}")
+
+        stream = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8")
+        try:
+            summary = import_posts(
+                stream, AuthorMap(default), batch_size=options["batch_size"], notify=not options["no_notify"]
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in summary["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['imported']} posts in {summary['seconds']}s ({summary['rows_per_second']} rows/s)"
+        ))
@@ -0,0 +1,267 @@
+import itertools
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from blog_app.models import Author, Comment, Follow, Like, Post, Reader, Tag, User
+from blog_app.search import update_search_vector
+
+
+WORDS = (
+    "django python postgres redis celery cache query index latency throughput async worker queue "
+    "feed author reader comment like follow tag search release deploy scaling database replica "
+    "pool connection benchmark profile memory thread process request response api json stream "
+    "batch migration schema model view serializer router token session cookie header timeout "
+    "retry backoff metric trace log alert incident review design pattern refactor test fixture"
+).split()
+
+# Spread timestamps over the dataset's lifetime; comments land after their post
+POST_DATES_SQL = """
+UPDATE {post} SET created_at = t.ts, updated_at = t.ts
+FROM (SELECT id, NOW() - random() * %s * INTERVAL '1 day' AS ts FROM {post} WHERE id = ANY(%s)) AS t
+WHERE {post}.id = t.id
+"""
+
+COMMENT_DATES_SQL = """
+UPDATE {comment} SET created_at = t.ts, updated_at = t.ts
+FROM (
+    SELECT c.id, p.created_at + random() * (NOW() - p.created_at) AS ts
+    FROM {comment} c JOIN {post} p ON p.id = c.post_id
+    WHERE c.id = ANY(%s)
+) AS t
+WHERE {comment}.id = t.id
+"""
+
+FOLLOW_DATES_SQL = """
+UPDATE {follow} SET created_at = NOW() - random() * %s * INTERVAL '1 day' WHERE id = ANY(%s)
+"""
+
+
+def zipf_cum_weights(rng, n, exponent):
+    """Cumulative power-law weights over ``n`` items, with popularity ranks shuffled across them."""
+    weights = [1 / rank ** exponent for rank in range(1, n + 1)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def unique_pairs(rng, targets, cum_weights, actors, count):
+    """Draw up to ``count`` distinct (target, actor) pairs, targets by weight and actors uniformly."""
+    count = min(count, len(targets) * len(actors))
+    pairs = set()
+    for _ in range(20):
+        missing = count - len(pairs)
+        if not missing:
+            break
+        pairs.update(zip(rng.choices(targets, cum_weights=cum_weights, k=missing), rng.choices(actors, k=missing)))
+    return list(pairs)
+
+
+def chunked(items, size):
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def table_sql(sql):
+    return sql.format(
+        post=Post._meta.db_table, comment=Comment._meta.db_table, follow=Follow._meta.db_table,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a realistic dataset with batched bulk_create: users split into authors and "
+        "readers, tags, posts, comments, likes and follows. Posts per author, followers per "
+        "author and likes and comments per post follow a power law, so a few authors and posts "
+        "are very popular and most get little attention. Counters and search vectors are filled in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--author-ratio", type=float, default=0.05, help="Share of users that are authors.")
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--draft-ratio", type=float, default=0.1)
+        parser.add_argument("--comments", type=int, default=100000)
+        parser.add_argument("--likes", type=int, default=200000)
+        parser.add_argument("--follows", type=int, default=100000)
+        parser.add_argument("--exponent", type=float, default=1.1, help="Power-law exponent of popularity.")
+        parser.add_argument("--days", type=int, default=365, help="Spread timestamps over this many days.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument("--prefix", default="seed", help="Username and tag name prefix.")
+        parser.add_argument("--password", default="password", help="Password of every seeded user.")
+        parser.add_argument("--clear", action="store_true", help="Delete data from an earlier run with this prefix first.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["clear"]:
+            deleted, _ = User.objects.filter(username__startswith=f"{prefix}_").delete()
+            Tag.objects.filter(name__startswith=f"{prefix}_").delete()
+            self.stdout.write(f"Deleted {deleted} rows from an earlier run")
+        elif User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Users prefixed {prefix!r} already exist; pass --clear or another --prefix")
+
+        authors = max(1, round(options["users"] * options["author_ratio"]))
+        readers = options["users"] - authors
+        if readers < 1:
+            raise CommandError("--author-ratio leaves no readers")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.options = options
+        plan = self.plan(authors, readers)
+        with transaction.atomic():
+            self.insert(plan, authors, readers)
+
+    def plan(self, authors, readers):
+        """Decide every row by index before inserting, so counters can be written with the rows."""
+        rng, options = self.rng, self.options
+        users = authors + readers
+        author_weights = zipf_cum_weights(rng, authors, options["exponent"])
+
+        post_authors = rng.choices(range(authors), cum_weights=author_weights, k=options["posts"])
+        published = [i for i in range(options["posts"]) if rng.random() >= options["draft_ratio"]]
+        post_status = dict.fromkeys(range(options["posts"]), "draft") | dict.fromkeys(published, "published")
+
+        # Only published posts collect comments and likes
+        post_weights = zipf_cum_weights(rng, len(published), options["exponent"]) if published else []
+        comments = []
+        if published:
+            comments = list(zip(
+                rng.choices(published, cum_weights=post_weights, k=options["comments"]),
+                rng.choices(range(users), k=options["comments"]),
+            ))
+        likes = unique_pairs(rng, published, post_weights, range(users), options["likes"]) if published else []
+        follows = unique_pairs(rng, range(authors), author_weights, range(readers), options["follows"])
+
+        tag_weights = zipf_cum_weights(rng, options["tags"], options["exponent"]) if options["tags"] else []
+        post_tags = [
+            set(rng.choices(range(options["tags"]), cum_weights=tag_weights, k=rng.randint(0, 4)))
+            if options["tags"] else set()
+            for _ in range(options["posts"])
+        ]
+        return {
+            "post_authors": post_authors,
+            "post_status": post_status,
+            "post_tags": post_tags,
+            "comments": comments,
+            "likes": likes,
+            "follows": follows,
+            "like_counts": Counter(post for post, _ in likes),
+            "comment_counts": Counter(post for post, _ in comments),
+            "follower_counts": Counter(author for author, _ in follows),
+        }
+
+    def insert(self, plan, authors, readers):
+        prefix, options = self.options["prefix"], self.options
+        password = make_password(options["password"])
+
+        with self.phase("users"):
+            author_users = self.create(User, (
+                User(username=f"{prefix}_author_{i}", email=f"{prefix}_author_{i}@example.com",
+                     role="author", password=password)
+                for i in range(authors)
+            ))
+            reader_users = self.create(User, (
+                User(username=f"{prefix}_reader_{i}", email=f"{prefix}_reader_{i}@example.com",
+                     role="reader", password=password)
+                for i in range(readers)
+            ))
+            user_ids = [u.id for u in author_users + reader_users]
+
+        with self.phase("authors and readers"):
+            author_ids = [a.id for a in self.create(Author, (
+                Author(user=user, bio=self.sentence(8, 30), follower_count=plan["follower_counts"][i])
+                for i, user in enumerate(author_users)
+            ))]
+            reader_ids = [r.id for r in self.create(Reader, (Reader(user=user) for user in reader_users))]
+
+        with self.phase("tags"):
+            tag_ids = [t.id for t in self.create(Tag, (
+                Tag(name=f"{prefix}_{self.rng.choice(WORDS)}_{i}") for i in range(options["tags"])
+            ))]
+
+        post_ids = []
+        with self.phase("posts"):
+            through = Post.tags.through
+            for batch in chunked(range(options["posts"]), self.batch_size):
+                posts = Post.objects.bulk_create([
+                    Post(
+                        author_id=author_ids[plan["post_authors"][i]],
+                        title=self.sentence(3, 8).rstrip(".").title(),
+                        content=" ".join(self.sentence(6, 20) for _ in range(self.rng.randint(1, 12))),
+                        status=plan["post_status"][i],
+                        like_count=plan["like_counts"][i],
+                        comment_count=plan["comment_counts"][i],
+                    )
+                    for i in batch
+                ])
+                ids = [post.id for post in posts]
+                through.objects.bulk_create([
+                    through(post_id=post_id, tag_id=tag_ids[tag])
+                    for i, post_id in zip(batch, ids) for tag in plan["post_tags"][i]
+                ])
+                self.run_sql(POST_DATES_SQL, [options["days"], ids])
+                update_search_vector(ids)
+                post_ids += ids
+
+        with self.phase("comments"):
+            for batch in chunked(plan["comments"], self.batch_size):
+                comments = Comment.objects.bulk_create([
+                    Comment(post_id=post_ids[post], user_id=user_ids[user], content=self.sentence(3, 40))
+                    for post, user in batch
+                ])
+                self.run_sql(COMMENT_DATES_SQL, [[comment.id for comment in comments]])
+
+        with self.phase("likes"):
+            for batch in chunked(plan["likes"], self.batch_size):
+                Like.objects.bulk_create([Like(post_id=post_ids[post], user_id=user_ids[user]) for post, user in batch])
+
+        with self.phase("follows"):
+            for batch in chunked(plan["follows"], self.batch_size):
+                follows = Follow.objects.bulk_create([
+                    Follow(author_id=author_ids[author], reader_id=reader_ids[reader]) for author, reader in batch
+                ])
+                self.run_sql(FOLLOW_DATES_SQL, [options["days"], [follow.id for follow in follows]])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {authors} authors, {readers} readers, {len(tag_ids)} tags, {len(post_ids)} posts, "
+            f"{len(plan['comments'])} comments, {len(plan['likes'])} likes and {len(plan['follows'])} follows"
+        ))
+        if plan["follower_counts"]:
+            top = plan["follower_counts"].most_common(1)[0][1]
+            self.stdout.write(f"Most followed author: {top} followers; median: {self.median(plan['follower_counts'], authors)}")
+        if plan["like_counts"]:
+            top = plan["like_counts"].most_common(1)[0][1]
+            self.stdout.write(f"Most liked post: {top} likes; median: {self.median(plan['like_counts'], len(post_ids))}")
+
+    def create(self, model, objects):
+        created = []
+        for batch in chunked(objects, self.batch_size):
+            created += model.objects.bulk_create(batch)
+        return created
+
+    def run_sql(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(table_sql(sql), params)
+
+    def sentence(self, shortest, longest):
+        words = self.rng.choices(WORDS, k=self.rng.randint(shortest, longest))
+        return " ".join(words).capitalize() + "."
+
+    @staticmethod
+    def median(counts, population):
+        ordered = sorted(list(counts.values()) + [0] * (population - len(counts)))
+        return ordered[len(ordered) // 2]
+
+    @contextmanager
+    def phase(self, label):
+        start = time.perf_counter()
+        yield
+        self.stdout.write(f"{label}: {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,111 @@
+"""
+Helpers for the benchmark commands that load-test a real server process.
+
+``serve`` starts gunicorn or uvicorn on a free port as a subprocess and ``load``
+drives it from an asyncio client with a fixed number of concurrent connections.
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Server exited with code {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server did not start listening on port {port}")
+
+
+@contextmanager
+def serve(command, env=None):
+    """Run ``python -m <command>`` with ``{port}`` filled in; yields the port once it listens."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", *(part.format(port=port) for part in command)],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(port, process)
+        yield port
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def fetch(port, path, token=None):
+    """GET ``path`` on a fresh connection; returns ``(status, body)``."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    authorization = f"Authorization: Bearer {token}\r\n" if token else ""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n{authorization}Connection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), body
+
+
+def fetch_json(port, path, token=None):
+    status, body = asyncio.run(fetch(port, path, token))
+    return status, json.loads(body) if body else None
+
+
+async def _load(port, paths, token, total, concurrency):
+    timings, codes = [], []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            path = paths[remaining % len(paths)]
+            start = time.perf_counter()
+            status, _ = await fetch(port, path, token)
+            timings.append(time.perf_counter() - start)
+            codes.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, timings, codes
+
+
+def load(port, paths, token, total, concurrency):
+    """Send ``total`` GETs cycling through ``paths``; returns ``(seconds, timings, status codes)``."""
+    if isinstance(paths, str):
+        paths = [paths]
+    return asyncio.run(_load(port, paths, token, total, concurrency))
+
+
+def summarize(elapsed, timings, codes):
+    statuses = ", ".join(f"{code}: {codes.count(code)}" for code in sorted(set(codes)))
+    return (
+        f"{len(codes) / elapsed:>7.0f} req/s p50={percentile(timings, 50):.1f}ms "
+        f"p95={percentile(timings, 95):.1f}ms p99={percentile(timings, 99):.1f}ms [{statuses}]"
+    )
@@ -0,0 +1,168 @@
+"""
+Sets of ids mirrored from Postgres, for membership checks that skip the database.
+
+A set is materialized from the database the first time it is read and kept current
+by write-through: a write is applied only to a set that already exists. Every
+materialized set holds ``EMPTY_MARKER``, so an empty set still exists and one
+SMISMEMBER that includes the marker also tells whether the set is there.
+
+A rebuild can race a write that commits after the rebuild's query but reaches Redis
+before the rebuilt set does. Every write therefore bumps a per-set generation, even
+when the set is missing. A rebuild is built in a temporary key and renamed into place
+only if the generation has not moved since before its query. Otherwise it is dropped,
+its rows answer that one read, and the next read rebuilds.
+
+``RedisSets`` keeps sets in Redis for ``ttl_setting`` seconds. ``LocalSets`` keeps
+them in this process's memory, for tests and single-process runs.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+
+from .redis_client import get_redis
+
+
+EMPTY_MARKER = "0"
+# Members per SADD while a rebuilt set is filled
+REBUILD_CHUNK = 1000
+
+# Bump the generation, then apply SADD/SREM only if the set is already materialized
+WRITE_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call(ARGV[1], KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Move a rebuilt set into place unless a write arrived since its query started
+INSTALL_SCRIPT = """
+if (redis.call('GET', KEYS[3]) or '') == ARGV[1] then
+    redis.call('RENAME', KEYS[2], KEYS[1])
+    return 1
+end
+redis.call('DEL', KEYS[2])
+return 0
+"""
+
+_write_script = None
+_install_script = None
+
+
+def generation_key(key):
+    return f"{key}:generation"
+
+
+def write(key, command, member, ttl):
+    """Apply ``SADD`` or ``SREM`` of ``member`` to the set at ``key`` if it is materialized."""
+    global _write_script
+    client = get_redis()
+    if _write_script is None:
+        _write_script = client.register_script(WRITE_SCRIPT)
+    _write_script(keys=[key, generation_key(key)], args=[command, member, ttl], client=client)
+
+
+def forget(key, ttl):
+    """Drop the set at ``key`` so it is rebuilt on the next read, beating any rebuild already running."""
+    pipe = get_redis().pipeline()
+    pipe.incr(generation_key(key))
+    pipe.expire(generation_key(key), ttl)
+    pipe.delete(key)
+    pipe.execute()
+
+
+def generations(client, keys):
+    """Read before the rebuild query; ``install`` compares against these."""
+    return [value or "" for value in client.mget([generation_key(key) for key in keys])]
+
+
+def install(pipe, key, generation, members, ttl):
+    """Queue the rebuild of ``key`` from ``members`` on ``pipe``."""
+    global _install_script
+    if _install_script is None:
+        _install_script = get_redis().register_script(INSTALL_SCRIPT)
+    members = [EMPTY_MARKER, *members]
+    temp = f"{key}:rebuild:{uuid.uuid4().hex}"
+    for start in range(0, len(members), REBUILD_CHUNK):
+        pipe.sadd(temp, *members[start:start + REBUILD_CHUNK])
+    pipe.expire(temp, ttl)
+    _install_script(keys=[key, temp, generation_key(key)], args=[generation], client=pipe)
+
+
+class RedisSets:
+    def __init__(self, ttl_setting):
+        self.ttl_setting = ttl_setting
+
+    @property
+    def ttl(self):
+        return getattr(settings, self.ttl_setting)
+
+    def write(self, key, command, member):
+        write(key, command, member, self.ttl)
+
+    def rebuild(self, key, load):
+        client = get_redis()
+        [generation] = generations(client, [key])
+        members = {str(member) for member in load()}
+        pipe = client.pipeline(transaction=False)
+        install(pipe, key, generation, members, self.ttl)
+        pipe.execute()
+        return members
+
+    def contains(self, key, members, load):
+        """Return one bool per member, in one Redis call when the set is materialized."""
+        replies = get_redis().smismember(key, [EMPTY_MARKER, *members])
+        if replies[0]:
+            return [bool(reply) for reply in replies[1:]]
+        materialized = self.rebuild(key, load)
+        return [str(member) in materialized for member in members]
+
+    def members(self, key, load):
+        members = set(get_redis().smembers(key))
+        if EMPTY_MARKER not in members:
+            return self.rebuild(key, load)
+        members.discard(EMPTY_MARKER)
+        return members
+
+
+class LocalSets:
+    """The same sets in a dict. Nothing expires, and writes in other processes are not seen."""
+
+    def __init__(self):
+        self._sets = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def write(self, key, command, member):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if key in self._sets:
+                if command == "SADD":
+                    self._sets[key].add(str(member))
+                else:
+                    self._sets[key].discard(str(member))
+
+    def rebuild(self, key, load):
+        with self._lock:
+            generation = self._generations.get(key, 0)
+        members = {str(member) for member in load()}
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._sets[key] = members
+        return members
+
+    def _get(self, key, load):
+        with self._lock:
+            members = self._sets.get(key)
+            if members is not None:
+                return set(members)
+        return self.rebuild(key, load)
+
+    def contains(self, key, members, load):
+        materialized = self._get(key, load)
+        return [str(member) in materialized for member in members]
+
+    def members(self, key, load):
+        return self._get(key, load)
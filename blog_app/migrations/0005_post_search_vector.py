@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_search_vector(apps, schema_editor):
+    Post = apps.get_model("blog_app", "Post")
+    Tag = apps.get_model("blog_app", "Tag")
+    tag_names = (
+        Tag.objects.filter(posts=OuterRef("pk"))
+        .values("posts")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    Post.objects.update(
+        search_vector=SearchVector("title", weight="A")
+        + SearchVector("content", weight="B")
+        + SearchVector(Coalesce(Subquery(tag_names), Value(""), output_field=TextField()), weight="C")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog_app", "0004_alter_follow_unique_together"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="post_search_vector_gin"
+            ),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
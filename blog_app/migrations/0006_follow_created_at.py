@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog_app", "0005_post_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="follow",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog_app", "0006_follow_created_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "-created_at", "-id"], name="comment_post_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(fields=["author", "-created_at", "-id"], name="follow_author_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(fields=["post", "user"], name="like_post_user_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(condition=models.Q(("status", "published")), fields=["-created_at", "-id"], name="post_published_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["author", "-created_at", "-id"], name="post_author_created_idx"),
+        ),
+    ]
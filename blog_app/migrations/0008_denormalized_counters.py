@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, fk):
+    counts = (
+        model.objects.filter(**{fk: OuterRef("pk")})
+        .order_by()
+        .values(fk)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model("blog_app", "Post")
+    Author = apps.get_model("blog_app", "Author")
+    Like = apps.get_model("blog_app", "Like")
+    Comment = apps.get_model("blog_app", "Comment")
+    Follow = apps.get_model("blog_app", "Follow")
+    Post.objects.update(like_count=count_of(Like, "post"), comment_count=count_of(Comment, "post"))
+    Author.objects.update(follower_count=count_of(Follow, "author"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog_app", "0007_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="follower_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:38
+
+from django.db import migrations, models, transaction
+
+
+DEDUPLICATE_BATCH_SQL = """
+WITH duplicates AS (
+    SELECT post_id, user_id, MIN(id) AS keep_id
+    FROM blog_app_like
+    GROUP BY post_id, user_id
+    HAVING COUNT(*) > 1
+    LIMIT %s
+), removed AS (
+    DELETE FROM blog_app_like AS l
+    USING duplicates AS d
+    WHERE l.post_id = d.post_id AND l.user_id = d.user_id AND l.id <> d.keep_id
+    RETURNING l.post_id
+)
+UPDATE blog_app_post AS p
+SET like_count = GREATEST(p.like_count - r.removed, 0)
+FROM (SELECT post_id, COUNT(*) AS removed FROM removed GROUP BY post_id) AS r
+WHERE p.id = r.post_id
+"""
+
+
+def deduplicate_likes(apps, schema_editor, batch_size=1000):
+    # One short transaction per batch of duplicate groups, so the table is never locked for long
+    while True:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(DEDUPLICATE_BATCH_SQL, [batch_size])
+                if cursor.rowcount == 0:
+                    return
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("blog_app", "0008_denormalized_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="like",
+            constraint=models.UniqueConstraint(fields=("post", "user"), name="like_post_user_unique"),
+        ),
+        migrations.RemoveIndex(
+            model_name="like",
+            name="like_post_user_idx",
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 class User(AbstractUser):
@@ -13,6 +15,8 @@ class User(AbstractUser):
 class Author(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField()
+    # Maintained by the follow views, repaired by blog_app.counters.reconcile
+    follower_count = models.PositiveIntegerField(default=0)
 
     def get_posts(self):
         return self.posts.all()
@@ -47,6 +51,24 @@ class Post(models.Model):
     tags = models.ManyToManyField(Tag, related_name="posts")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by the like and comment views, repaired by blog_app.counters.reconcile
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Maintained by blog_app.signals from title, content and tag names
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="post_search_vector_gin"),
+            # Readers' post_list: published posts, newest first
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(status="published"),
+                name="post_published_created_idx",
+            ),
+            # Authors' post_list: one author's posts, newest first
+            models.Index(fields=["author", "-created_at", "-id"], name="post_author_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -59,6 +81,9 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["post", "-created_at", "-id"], name="comment_post_created_idx")]
+
     def __str__(self):
         return f"Comment by {self.user} on {self.post}"
 
@@ -67,6 +92,9 @@ class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="likes")
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["post", "user"], name="like_post_user_unique")]
+
     def __str__(self):
         return f"{self.user} liked {self.post}"
 
@@ -74,9 +102,11 @@ class Like(models.Model):
 class Follow(models.Model):
     reader = models.ForeignKey(Reader, related_name='follows', on_delete=models.CASCADE)
     author = models.ForeignKey(Author, related_name='followers', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ['reader', 'author']
+        indexes = [models.Index(fields=["author", "-created_at", "-id"], name="follow_author_created_idx")]
 
     def __str__(self):
         return f"{self.reader} follows {self.author}"
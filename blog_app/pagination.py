@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .search import get_search_mode
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (created_at, id), newest first.
+
+    Each page is a single index range scan: there is no COUNT(*) and no OFFSET,
+    and rows inserted while a client is paging land before its cursor instead of
+    shifting later pages.
+
+    Any other ordering on the queryset, such as search rank, is replaced, so ranked
+    results are paged with page numbers instead (see ``get_post_paginator``).
+    """
+    page_size = 10
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.finish_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by("-created_at", "-id")
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        # One extra row tells whether there is a next page
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = (results[-1].created_at, results[-1].pk) if self.has_next else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        payload = json.dumps({"c": created_at.isoformat(), "i": pk}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            return datetime.fromisoformat(payload["c"]), int(payload["i"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def use_cursor_pagination(request):
+    mode = request.query_params.get("pagination", settings.PAGINATION_MODE)
+    return mode == "cursor" or KeysetPagination.cursor_query_param in request.query_params
+
+
+def get_post_paginator(request):
+    # Full-text results are ordered by rank, which a (created_at, id) cursor cannot follow
+    ranked = request.query_params.get("search") and get_search_mode(request) == "fulltext"
+    if use_cursor_pagination(request) and not ranked:
+        return KeysetPagination()
+    paginator = PageNumberPagination()
+    paginator.page_size = 10
+    return paginator
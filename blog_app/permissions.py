@@ -1,10 +1,14 @@
 from rest_framework.permissions import BasePermission
 
+from .authentication import author_profile, reader_profile
 
+
+# The profile checks are free: ProfileJWTAuthentication loads both profiles with the user
 class IsAuthor(BasePermission):
     def has_permission(self, request, view):
         return bool(
             request.user and request.user.is_authenticated and request.user.role == "author"
+            and author_profile(request.user) is not None
         )
 
 
@@ -12,6 +16,7 @@ class IsReader(BasePermission):
     def has_permission(self, request, view):
         return bool(
             request.user and request.user.is_authenticated and request.user.role == "reader"
+            and reader_profile(request.user) is not None
         )
 
 
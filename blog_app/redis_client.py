@@ -0,0 +1,18 @@
+import redis
+from django.conf import settings
+
+
+_client = None
+
+
+def get_redis():
+    """Shared client for application data (feeds, caches, counters); Celery keeps its own connection."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
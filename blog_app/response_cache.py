@@ -0,0 +1,73 @@
+"""
+Versioned response cache for post detail and comment list GETs.
+
+Every post has a version number in the cache. Response keys embed it, so bumping
+the version on a write makes all of that post's cached responses unreachable in
+one operation, without scanning or deleting keys; the stale entries simply expire.
+Only responses for published posts are stored, so drafts are always served from
+the database through the author check in the view.
+
+Bodies read on a cache miss come from ``FILL_DB``, the primary: a replica still
+behind a write would otherwise be cached under the version that write bumped and
+served for ``RESPONSE_CACHE_TIMEOUT``.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from . import instrumentation
+from .db_router import PRIMARY
+
+
+FILL_DB = PRIMARY
+
+def _version_key(post_id):
+    return f"post:{post_id}:version"
+
+
+def get_version(post_id):
+    key = _version_key(post_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(post_id):
+    try:
+        cache.incr(_version_key(post_id))
+    except ValueError:
+        get_version(post_id)
+
+
+def _response_key(view_name, post_id, request):
+    query = request.query_params.urlencode()
+    return f"response:{view_name}:{post_id}:{get_version(post_id)}:{query}"
+
+
+def get(view_name, post_id, request):
+    """
+    Return ``(key, data)``; ``data`` is None on a miss, and the key is what ``store``
+    should fill, so the version is read once per request.
+    """
+    key = _response_key(view_name, post_id, request)
+    data = cache.get(key)
+    instrumentation.record_cache("misses" if data is None else "hits")
+    return key, data
+
+
+def store(key, data):
+    cache.set(key, _plain(data), settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def _plain(data):
+    # Serializer return types keep a reference to their serializer, which should not be pickled
+    if isinstance(data, ReturnList):
+        return list(data)
+    if isinstance(data, (ReturnDict, dict)):
+        return {key: _plain(value) for key, value in data.items()}
+    return data
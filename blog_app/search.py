@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from .models import Post, Tag
+
+
+SEARCH_MODES = ("fulltext", "icontains")
+
+
+def tag_names_subquery():
+    # Space separated tag names for the outer post, so they can be indexed alongside title and content
+    names = (
+        Tag.objects.filter(posts=OuterRef("pk"))
+        .values("posts")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    return Coalesce(Subquery(names), Value(""), output_field=TextField())
+
+
+def post_search_vector():
+    return (
+        SearchVector("title", weight="A")
+        + SearchVector("content", weight="B")
+        + SearchVector(tag_names_subquery(), weight="C")
+    )
+
+
+def update_search_vector(post_ids=None):
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    # A queryset update does not fire post_save, so this never recurses into the signal handlers
+    return posts.update(search_vector=post_search_vector())
+
+
+def get_search_mode(request):
+    mode = request.query_params.get("search_mode", settings.POST_SEARCH_MODE)
+    return mode if mode in SEARCH_MODES else settings.POST_SEARCH_MODE
+
+
+def search_posts(posts, search_query, mode="fulltext"):
+    if mode == "icontains":
+        return posts.filter(
+            Q(title__icontains=search_query) |
+            Q(content__icontains=search_query) |
+            Q(tags__name__icontains=search_query)
+        ).distinct()
+
+    query = SearchQuery(search_query, search_type="websearch")
+    return (
+        posts.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-created_at")
+    )
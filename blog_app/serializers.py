@@ -1,8 +1,30 @@
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import serializers
+from .instrumentation import TimedRepresentationMixin
 from .models import User, Author, Tag, Comment, Post, Reader, Like, Follow
+from .search import update_search_vector
 
 
-class UserSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Serializers declare the related rows they render in ``select_related`` /
+    ``prefetch_related``; views pass their querysets through
+    ``setup_eager_loading`` so nested output never issues per-row queries.
+    """
+    select_related = ()
+    prefetch_related = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related:
+            queryset = queryset.select_related(*cls.select_related)
+        if cls.prefetch_related:
+            queryset = queryset.prefetch_related(*cls.prefetch_related)
+        return queryset
+
+
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "password", "role"]
@@ -21,30 +43,67 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedRepresentationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    select_related = ("user",)
 
     class Meta:
         model = Author
-        fields = ["id", "user"]
+        fields = ["id", "user", "follower_count"]
+        read_only_fields = ["follower_count"]
 
 
-class ReaderSerializer(serializers.ModelSerializer):
+class ReaderSerializer(TimedRepresentationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    select_related = ("user",)
 
     class Meta:
         model = Reader
         fields = ["id", "user"]
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name"]
 
 
-class PostSerializer(serializers.ModelSerializer):
+def resolve_tags(values):
+    """
+    Map tag ids and names to Tag rows in at most three queries, however many tags
+    there are: one lookup, one conflict-tolerant insert of new names, and one
+    re-read of the names that were just inserted (possibly by a concurrent request).
+    """
+    ids = {int(value) for value in values if value.isdigit()}
+    names = {value for value in values if not value.isdigit()}
+    tags = list(Tag.objects.filter(Q(id__in=ids) | Q(name__in=names)))
+
+    unknown_ids = ids - {tag.id for tag in tags}
+    if unknown_ids:
+        raise serializers.ValidationError({"tags": [f"Unknown tag id: {i}" for i in sorted(unknown_ids)]})
+
+    missing_names = names - {tag.name for tag in tags}
+    if missing_names:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing_names], ignore_conflicts=True)
+        tags += Tag.objects.filter(name__in=missing_names)
+    return tags
+
+
+def set_post_tags(post, tags, clear=False):
+    through = Post.tags.through
+    tag_ids = {tag.id for tag in tags}
+    if clear:
+        through.objects.filter(post_id=post.id).exclude(tag_id__in=tag_ids).delete()
+    through.objects.bulk_create(
+        [through(post_id=post.id, tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True
+    )
+    # Writing the through rows directly skips m2m_changed, so refresh the search vector here
+    update_search_vector([post.id])
+
+
+class PostSerializer(TimedRepresentationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
+    select_related = ("author__user",)
     tags = serializers.ListField(
         child=serializers.CharField(),
         write_only=True
@@ -53,24 +112,31 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ["id", "title", "author", "content", "tags", "status","created_at", "updated_at"]
+        fields = ["id", "title", "author", "content", "tags", "status", "like_count", "comment_count",
+                  "created_at", "updated_at"]
+        read_only_fields = ["like_count", "comment_count"]
 
     def create(self, validated_data):
         tags_data = validated_data.pop("tags", [])
-        post = Post.objects.create(**validated_data)
-
-        for tag_info in tags_data:
-            if tag_info.isdigit():
-                tag = Tag.objects.get(id=int(tag_info))
-            else:
-                tag, created = Tag.objects.get_or_create(name=tag_info)
-            post.tags.add(tag)
+        with transaction.atomic():
+            tags = resolve_tags(tags_data)
+            post = Post.objects.create(**validated_data)
+            set_post_tags(post, tags)
+        return post
 
+    def update(self, instance, validated_data):
+        tags_data = validated_data.pop("tags", None)
+        with transaction.atomic():
+            tags = resolve_tags(tags_data) if tags_data is not None else None
+            post = super().update(instance, validated_data)
+            if tags is not None:
+                set_post_tags(post, tags, clear=True)
         return post
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedRepresentationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    select_related = ("user",)
     post = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all())
 
     class Meta:
@@ -78,8 +144,9 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "post", "content", "created_at", "updated_at"]
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(TimedRepresentationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    select_related = ("user",)
     post = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all())
 
     class Meta:
@@ -87,17 +154,10 @@ class LikeSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "post"]
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(TimedRepresentationMixin, EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Follow
-        fields = ['id', 'reader', 'author']
+        fields = ['id', 'reader', 'author', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-    def validate(self, data):
-        reader = data['reader']
-        author = data['author']
-        if Follow.objects.filter(reader=reader, author=author).exists():
-            raise serializers.ValidationError("You are already following this author.")
-        return data
-
 
@@ -1,3 +1,66 @@
-from django.dispatch import Signal
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from . import db_metrics, instrumentation
+from .authentication import invalidate_identity
+from .models import Author, Post, Reader, Tag, User
+from .search import update_search_vector
 
 password_reset_requested = Signal()
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_search_vector(sender, instance, **kwargs):
+    update_search_vector([instance.pk])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_post_search_vector_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # instance is a Tag; remember its posts before the links disappear
+        instance._cleared_post_ids = list(instance.posts.values_list("pk", flat=True))
+    elif reverse and action == "post_clear":
+        update_search_vector(instance.__dict__.pop("_cleared_post_ids", []))
+    elif reverse and action in ("post_add", "post_remove"):
+        update_search_vector(pk_set)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        update_search_vector([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def refresh_search_vector_on_tag_rename(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vector(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_posts(sender, instance, **kwargs):
+    # The links are gone by post_delete
+    instance._deleted_post_ids = list(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_search_vector_on_tag_delete(sender, instance, **kwargs):
+    update_search_vector(instance.__dict__.pop("_deleted_post_ids", []))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_identity(sender, instance, **kwargs):
+    invalidate_identity(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Author)
+@receiver([post_save, post_delete], sender=Reader)
+def invalidate_profile_identity(sender, instance, **kwargs):
+    invalidate_identity(instance.user_id)
+
+
+@receiver(connection_created)
+def count_db_connection(sender, connection, **kwargs):
+    db_metrics.record_connection(connection.alias)
+
+
+@receiver(connection_created)
+def instrument_db_connection(sender, connection, **kwargs):
+    instrumentation.install(connection)
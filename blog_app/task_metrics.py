@@ -0,0 +1,112 @@
+"""
+Celery task metrics.
+
+The publisher stamps every message with its enqueue time. When a worker starts the
+task it records the queue wait (from the enqueue time, or from the ETA for delayed
+tasks and retries); when the task ends it records the run time by final state.
+Retries are counted per task. Workers add these to the request metrics hash
+(see blog_app.instrumentation), and ``/metrics`` reads each queue's depth from the
+broker when it is scraped.
+"""
+import threading
+import time
+from datetime import datetime
+
+import redis
+from celery.signals import before_task_publish, task_postrun, task_prerun, task_retry, worker_process_shutdown
+from django.conf import settings
+
+from . import instrumentation
+
+
+_started = {}
+_started_lock = threading.Lock()
+
+
+def _queue(task):
+    return (task.request.delivery_info or {}).get("routing_key") or "eager"
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+@task_prerun.connect
+def record_queue_wait(task_id=None, task=None, **kwargs):
+    with _started_lock:
+        _started[task_id] = time.perf_counter()
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at is None:
+        return
+    eta = task.request.eta
+    if eta:
+        enqueued_at = max(enqueued_at, datetime.fromisoformat(eta).timestamp() if isinstance(eta, str) else eta.timestamp())
+    instrumentation.observe(
+        "blog_celery_task_queue_wait_seconds", max(time.time() - enqueued_at, 0.0),
+        instrumentation.TASK_BUCKETS, task=task.name, queue=_queue(task),
+    )
+
+
+@task_postrun.connect
+def record_runtime(task_id=None, task=None, state=None, **kwargs):
+    with _started_lock:
+        started = _started.pop(task_id, None)
+    if started is not None:
+        instrumentation.observe(
+            "blog_celery_task_runtime_seconds", time.perf_counter() - started,
+            instrumentation.TASK_BUCKETS, task=task.name, queue=_queue(task), state=state or "UNKNOWN",
+        )
+    if instrumentation.flush_due():
+        instrumentation.flush()
+
+
+@task_retry.connect
+def count_retry(sender=None, **kwargs):
+    instrumentation.increment("blog_celery_task_retries_total", task=sender.name)
+
+
+@worker_process_shutdown.connect
+def flush_on_shutdown(**kwargs):
+    instrumentation.flush()
+
+
+_broker = None
+
+
+def _broker_client():
+    # The broker is a Redis database of its own; reading list lengths needs no Celery connection
+    global _broker
+    if _broker is None:
+        _broker = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=2)
+    return _broker
+
+
+def queue_names():
+    routed = {route["queue"] for route in settings.CELERY_TASK_ROUTES.values()}
+    return sorted(routed | {"celery"})
+
+
+def render_queue_depths():
+    """Messages waiting per queue, summed over the broker's priority lists, in Prometheus text format."""
+    options = settings.CELERY_BROKER_TRANSPORT_OPTIONS
+    # Priority 0 uses the bare queue name; every other level has its own list
+    levels = [step for step in options["priority_steps"] if step]
+    names = queue_names()
+    pipe = _broker_client().pipeline(transaction=False)
+    for name in names:
+        pipe.llen(name)
+        for level in levels:
+            pipe.llen(f"{name}{options['sep']}{level}")
+    lengths = pipe.execute()
+
+    per_queue = len(levels) + 1
+    lines = [
+        "# HELP blog_celery_queue_depth Messages waiting in each Celery queue.",
+        "# TYPE blog_celery_queue_depth gauge",
+    ]
+    for index, name in enumerate(names):
+        depth = sum(lengths[index * per_queue:(index + 1) * per_queue])
+        lines.append(f'blog_celery_queue_depth{{queue="{name}"}} {depth}')
+    return "\n".join(lines) + "\n"
@@ -1,42 +1,191 @@
-from celery import shared_task
-from .models import Post, Follow, Author
-from django.core.mail import send_mail
+from smtplib import SMTPException
+
+from celery import group, shared_task
+from .models import Post, Follow, Author, User
+from . import comment_digest, counters, feed, mail
+from .redis_client import get_redis
+from django.core.mail import EmailMessage
 from django.conf import settings
+from django.template.loader import render_to_string
 
 
 
-@shared_task
-def notify_author_of_new_comment(post_id, comment_content):
+@shared_task(autoretry_for=(SMTPException, OSError), retry_backoff=True, max_retries=5)
+def send_comment_digests(batch_size=500):
+    """
+    Email each pending author one digest for the window. A batch's buffers are
+    acknowledged only after its mail is sent, so a failed send is retried with the
+    same comments; an author may then get a batch's digest twice, never zero times.
+    A run that finds another one holding the lock returns without sending.
+    """
+    token = comment_digest.lock()
+    if token is None:
+        return 0
+    try:
+        comment_digest.snapshot()
+        return _send_comment_digest_batches(batch_size)
+    finally:
+        comment_digest.unlock(token)
 
-    post = Post.objects.get(id=post_id)
-    author = post.author
 
-    print(f"Notification: {author.user.email} - A new comment was added to your post: '{post.title}'")
-    print(f"Comment content: {comment_content}")
+def _send_comment_digest_batches(batch_size):
+    sent = 0
+    while True:
+        pending = comment_digest.pending(batch_size)
+        if not pending:
+            return sent
+        post_ids = {post_id for counts in pending.values() for post_id in counts}
+        titles = dict(Post.objects.filter(id__in=post_ids).values_list("id", "title"))
+        authors = Author.objects.filter(id__in=pending).values_list("id", "user__username", "user__email")
 
+        messages = []
+        for author_id, username, email in authors:
+            counts = {post_id: n for post_id, n in pending[author_id].items() if post_id in titles}
+            if not email or not counts:
+                continue
+            lines = [f"{n} new comment(s) on '{titles[post_id]}'" for post_id, n in sorted(counts.items())]
+            messages.append(EmailMessage(
+                f"{sum(counts.values())} new comments on your posts",
+                f"Hi {username},\n\n" + "\n".join(lines),
+                settings.DEFAULT_FROM_EMAIL,
+                [email],
+            ))
+        if messages:
+            sent += mail.send(messages)
+        # Authors without an email or with only deleted posts are acknowledged too, so they do not loop
+        comment_digest.acknowledge(pending)
 
-@shared_task
-def notify_readers_of_new_post(author_id, post_title):
 
-    author = Author.objects.get(id=author_id)
-    followers = Follow.objects.filter(author=author)
+def follower_ranges(author_id):
+    """Split the author's followers into ``(after_id, until_id]`` Follow id ranges of ``NOTIFY_CHUNK_SIZE``."""
+    chunk_size = settings.NOTIFY_CHUNK_SIZE
+    follow_ids = Follow.objects.filter(author_id=author_id).order_by("id").values_list("id", flat=True)
 
-    for follow in followers:
-        reader_email = follow.reader.user.username
-        print(f"Notification:{author.user.username} published or updated a new post: '{post_title}'")
+    ranges = []
+    after_id = last_id = 0
+    for position, last_id in enumerate(follow_ids.iterator(chunk_size=5000), start=1):
+        if position % chunk_size == 0:
+            ranges.append((after_id, last_id))
+            after_id = last_id
+    if last_id != after_id:
+        ranges.append((after_id, last_id))
+    return ranges
 
-from django.core.mail import EmailMessage
 
 @shared_task
-def send_password_reset_email(subject, message, recipient_email):
-    email = EmailMessage(
-        subject=subject,
-        body=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[recipient_email],
+def notify_readers_of_new_post(author_id, post_id):
+    """
+    Split the author's followers into fixed-size Follow id ranges and deliver each
+    range as its own task in a Celery group, so chunks run in parallel and retry
+    independently.
+    """
+    ranges = follower_ranges(author_id)
+    group(deliver_post_notifications.s(author_id, post_id, start, end) for start, end in ranges).apply_async()
+    return len(ranges)
+
+
+def _notification_progress_key(kind, ident, after_id):
+    return f"notify:{kind}:{ident}:{after_id}"
+
+
+def _deliver_to_followers(author_id, progress_key, subject, body, after_id, until_id, batch_size):
+    client = get_redis()
+    progress = client.get(progress_key)
+    if progress == "done":
+        return 0
+    resume_after = int(progress) if progress else after_id
+
+    # One joined keyset range query instead of reader and user lookups per follower
+    recipients = (
+        Follow.objects.filter(author_id=author_id, id__gt=resume_after, id__lte=until_id)
+        .order_by("id")
+        .values_list("id", "reader__user__email")
     )
-    email.content_subtype = 'html'  # Ensuring the email is sent as HTML
-    email.send(fail_silently=False)
-    print("Mail sent")
+    sent = 0
+    batch, last_id = [], resume_after
+    for last_id, email in recipients.iterator(chunk_size=batch_size):
+        if email:
+            batch.append(EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email]))
+        if len(batch) >= batch_size:
+            sent += mail.send(batch)
+            client.set(progress_key, last_id, ex=86400)
+            batch = []
+    if batch:
+        sent += mail.send(batch)
+    client.set(progress_key, "done", ex=86400)
+    return sent
+
+
+@shared_task(bind=True, autoretry_for=(SMTPException, OSError), retry_backoff=True, max_retries=5)
+def deliver_post_notifications(self, author_id, post_id, after_id, until_id, batch_size=50):
+    """
+    Email the followers whose Follow id is in ``(after_id, until_id]`` over the
+    worker's pooled SMTP connection. Progress is checkpointed in Redis after every batch, so a retry
+    resumes where the previous attempt stopped and never resends delivered mail.
+    """
+    post = Post.objects.select_related("author__user").get(id=post_id)
+    subject = f"{post.author.user.username} published a new post"
+    body = f"{post.author.user.username} published a new post: '{post.title}'"
+    progress_key = _notification_progress_key("post", post_id, after_id)
+    return _deliver_to_followers(author_id, progress_key, subject, body, after_id, until_id, batch_size)
+
+
+@shared_task(bind=True)
+def notify_readers_of_post_digest(self, author_id, post_count):
+    """
+    Tell the author's followers about a bulk import with one email each, fanned out
+    in Follow id ranges like ``notify_readers_of_new_post``. The digest is keyed on
+    this task's id, so a redelivered task resumes its chunks instead of mailing twice.
+    """
+    ranges = follower_ranges(author_id)
+    group(
+        deliver_post_digest.s(author_id, post_count, self.request.id, start, end) for start, end in ranges
+    ).apply_async()
+    return len(ranges)
+
+
+@shared_task(bind=True, autoretry_for=(SMTPException, OSError), retry_backoff=True, max_retries=5)
+def deliver_post_digest(self, author_id, post_count, digest_id, after_id, until_id, batch_size=50):
+    """Email one import digest to the followers in ``(after_id, until_id]``, checkpointed like post notifications."""
+    author = Author.objects.select_related("user").get(id=author_id)
+    subject = f"{author.user.username} published {post_count} new posts"
+    body = f"{author.user.username} published {post_count} new posts."
+    progress_key = _notification_progress_key("digest", digest_id, after_id)
+    return _deliver_to_followers(author_id, progress_key, subject, body, after_id, until_id, batch_size)
+
+
+@shared_task
+def fan_out_post_to_feeds(post_id):
+    post = Post.objects.filter(pk=post_id, status="published").first()
+    if post is None:
+        return 0
+    return feed.fan_out(post)
+
+
+@shared_task
+def reconcile_counters(batch_size=1000):
+    return counters.reconcile_all(batch_size)
+
+
+@shared_task(autoretry_for=(SMTPException, OSError), retry_backoff=True, max_retries=5)
+def flush_mail_outbox():
+    return mail.flush_outbox()
 
 
+@shared_task(acks_late=False)
+def send_password_reset_email(user_id, url):
+    """
+    Render the reset email in the worker and send it together with anything else
+    waiting in the outbox, so a burst of resets shares one ``send_messages`` call.
+    """
+    user = User.objects.filter(pk=user_id).only("username", "email").first()
+    if user is None or not user.email:
+        return 0
+    message = render_to_string("password_reset_email.html", {"url": url, "user": user})
+    mail.enqueue("Password Reset Requested", message, user.email, html=True)
+    try:
+        return mail.flush_outbox()
+    except (SMTPException, OSError):
+        # The message is back in the outbox; retry delivery without re-rendering it
+        flush_mail_outbox.delay()
+        return 0
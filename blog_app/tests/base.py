@@ -0,0 +1,36 @@
+"""
+Isolation from the services the app shares in deployment.
+
+Each test gets a fresh in-memory Redis (fakeredis with Lua, see requirements-test.txt)
+in place of ``REDIS_URL`` and the Celery broker, and each test class a private locmem
+cache, so tests never read or write a developer's or a deployment's Redis.
+"""
+import fakeredis
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog_app import redis_client, task_metrics
+
+
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class IsolatedServicesMixin:
+    @classmethod
+    def setUpClass(cls):
+        # Entered before the test case's own setup, so setUpTestData already sees the local cache
+        cls.enterClassContext(override_settings(CACHES=LOCAL_CACHES))
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server, db=1, decode_responses=True)
+        self.replace_client(redis_client, "_client", self.redis)
+        self.replace_client(task_metrics, "_broker", fakeredis.FakeRedis(server=server, db=0))
+        cache.clear()
+
+    def replace_client(self, module, name, client):
+        setattr(module, name, client)
+        # Dropped after the test, so the next one (or the real app) builds its own
+        self.addCleanup(setattr, module, name, None)
@@ -0,0 +1,9 @@
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+
+class BenchmarkEndpointsOptionTests(SimpleTestCase):
+    def test_counts_must_be_positive(self):
+        for option in ("requests", "slow_requests", "concurrency", "actors"):
+            with self.subTest(option=option), self.assertRaisesMessage(CommandError, "must be at least 1"):
+                call_command("benchmark_endpoints", **{option: 0})
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog_app import db_router
+from blog_app.models import Author, Post, User
+
+from .base import IsolatedServicesMixin
+
+
+REPLICA = "replica_test"
+
+# Connections are configured before any test runs, so the alias is added when the module
+# is imported, which the runner does before it sets up the test databases. Like the
+# replica_N aliases from DATABASE_REPLICAS, it reads the primary's test database.
+settings.DATABASES.setdefault(REPLICA, {
+    **settings.DATABASES["default"],
+    "TEST": {**settings.DATABASES["default"]["TEST"], "MIRROR": "default"},
+})
+
+
+@override_settings(
+    DATABASE_ROUTERS=["blog_app.db_router.PrimaryReplicaRouter"],
+    DATABASE_REPLICA_CHECK_INTERVAL=0,
+    THROTTLE_BUCKETS={},
+)
+class ReplicaRoutingTests(IsolatedServicesMixin, TransactionTestCase):
+    # Mirror reads use their own connection, so they only see committed rows
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, db_router, "_checked_at", None)
+        self.user = User.objects.create(username="routed_author", role="author", is_active=True)
+        author = Author.objects.create(user=self.user, bio="")
+        self.post = Post.objects.create(author=author, title="Routed", content="", status="published")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def request(self, method, url):
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(url)
+        return response, len(primary), len(replica)
+
+    def test_safe_requests_read_from_the_replica(self):
+        response, primary, replica = self.request("get", reverse("post_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        response, primary, replica = self.request("post", reverse("like_post", kwargs={"post_id": self.post.pk}))
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_reads_after_a_write_are_pinned_to_the_primary(self):
+        self.request("post", reverse("like_post", kwargs={"post_id": self.post.pk}))
+        response, primary, replica = self.request("get", reverse("post_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # Once the window has passed, reads go back to the replica
+        cache.delete(db_router._pin_key(self.user.pk))
+        self.assertEqual(self.request("get", reverse("post_list"))[1], 0)
+
+    def test_lagging_or_failing_replicas_are_left_out(self):
+        for lag in (mock.Mock(return_value=settings.DATABASE_REPLICA_MAX_LAG + 1), mock.Mock(side_effect=DatabaseError)):
+            with self.subTest(lag=lag), mock.patch.object(db_router, "replica_lag", lag):
+                response, primary, replica = self.request("get", reverse("post_list"))
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(primary, 0)
+                self.assertEqual(replica, 0)
+                lag.assert_called_with(REPLICA)
@@ -0,0 +1,75 @@
+from django.test import TestCase, override_settings
+
+from blog_app import follows
+from blog_app.models import Author, Follow, Reader, User
+
+from .base import IsolatedServicesMixin
+
+
+class FollowGraphTests(IsolatedServicesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="graph_reader", role="reader")
+        cls.reader = Reader.objects.create(user=cls.user)
+        cls.authors = [
+            Author.objects.create(user=User.objects.create(username=f"graph_author_{i}", role="author"), bio="")
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.replace_client(follows, "_local_sets", None)
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        author = self.authors[0]
+        reader_id, author_exists, follow = follows.follow(self.user.pk, author.pk)
+        self.assertEqual((reader_id, author_exists), (self.reader.pk, True))
+        self.assertIsNotNone(follow)
+        self.assertIsNone(follows.follow(self.user.pk, author.pk)[2])
+        author.refresh_from_db()
+        self.assertEqual(author.follower_count, 1)
+
+        self.assertEqual(follows.unfollow(self.user.pk, author.pk), (self.reader.pk, True))
+        self.assertEqual(follows.unfollow(self.user.pk, author.pk), (self.reader.pk, False))
+        author.refresh_from_db()
+        self.assertEqual(author.follower_count, 0)
+
+    def test_missing_profiles_and_authors(self):
+        other = User.objects.create(username="graph_no_reader", role="reader")
+        self.assertEqual(follows.follow(other.pk, self.authors[0].pk), (None, True, None))
+        self.assertEqual(follows.follow(self.user.pk, 0), (self.reader.pk, False, None))
+
+    def test_sets_are_rebuilt_from_postgres_then_written_through(self):
+        first, second = (author.pk for author in self.authors)
+        # Written without the write-through, so only a rebuild can see it
+        Follow.objects.create(reader=self.reader, author_id=first)
+        self.assertEqual(follows.is_following(self.reader.pk, [first, second, first]), {first: True, second: False})
+        self.assertEqual(follows.follower_ids(first), {self.reader.pk})
+        self.assertEqual(follows.follower_ids(second), set())
+
+        follows.follow(self.user.pk, second)
+        with self.assertNumQueries(0):
+            self.assertEqual(follows.is_following(self.reader.pk, [second]), {second: True})
+            self.assertEqual(follows.follower_ids(second), {self.reader.pk})
+
+        follows.unfollow(self.user.pk, first)
+        with self.assertNumQueries(0):
+            self.assertEqual(follows.is_following(self.reader.pk, [first]), {first: False})
+            self.assertEqual(follows.follower_ids(first), set())
+
+    def test_rebuild_does_not_drop_a_racing_write(self):
+        sets, key = follows._sets(), follows.following_key(self.reader.pk)
+
+        def query_then_follow():
+            # The follow commits after the rebuild's query read its rows
+            rows = []
+            sets.write(key, "SADD", 7)
+            return rows
+
+        self.assertEqual(sets.contains(key, [7], query_then_follow), [False])
+        self.assertEqual(sets.contains(key, [7], lambda: [7]), [True])
+
+
+@override_settings(FOLLOW_GRAPH_BACKEND="local")
+class LocalFollowGraphTests(FollowGraphTests):
+    pass
@@ -0,0 +1,80 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from blog_app import importer
+from blog_app.models import Author, Post, Tag, User
+
+from .base import IsolatedServicesMixin
+
+
+def ndjson(*records):
+    return [record if isinstance(record, str) else json.dumps(record) for record in records]
+
+
+class ImportPostsTests(IsolatedServicesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(user=User.objects.create(username="importing_author", role="author"), bio="")
+
+    def setUp(self):
+        super().setUp()
+        self.fan_out = self.patch_task(importer.fan_out_post_to_feeds)
+        self.notify = self.patch_task(importer.notify_readers_of_post_digest)
+
+    def patch_task(self, task):
+        patcher = mock.patch.object(task, "delay")
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def post(self, title, **fields):
+        return {"title": title, "content": "Body", "author": "importing_author", **fields}
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        summary = importer.import_posts(ndjson(
+            "not json",
+            "[1, 2]",
+            {"title": "No content"},
+            self.post("Bad status", status="archived"),
+            self.post("Bad tags", tags=["ok", ""]),
+            self.post("Bool author", author=True),
+            self.post("Unknown author", author="nobody"),
+            "",
+            self.post("Fine"),
+        ), importer.AuthorMap())
+
+        self.assertEqual(summary["imported"], 1)
+        self.assertEqual([error["line"] for error in summary["errors"]], [1, 2, 3, 4, 5, 6, 7])
+        self.assertIn("author must be", summary["errors"][5]["error"])
+        self.assertEqual(list(Post.objects.values_list("title", flat=True)), ["Fine"])
+
+    def test_records_are_written_in_batches(self):
+        records = ndjson(*(self.post(f"Batched {i}") for i in range(5)))
+        with mock.patch.object(Post.objects, "bulk_create", wraps=Post.objects.bulk_create) as bulk_create:
+            summary = importer.import_posts(records, importer.AuthorMap(), batch_size=2)
+        self.assertEqual(summary["imported"], 5)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+
+    def test_tags_are_created_once_and_linked(self):
+        Tag.objects.create(name="existing")
+        importer.import_posts(ndjson(
+            self.post("First", tags=["existing", "new", "new"]),
+            self.post("Second", tags=["new"]),
+        ), importer.AuthorMap(), batch_size=1)
+
+        self.assertEqual(Tag.objects.filter(name__in=["existing", "new"]).count(), 2)
+        tags = {post.title: sorted(tag.name for tag in post.tags.all()) for post in Post.objects.prefetch_related("tags")}
+        self.assertEqual(tags, {"First": ["existing", "new"], "Second": ["new"]})
+
+    def test_published_posts_are_fanned_out_and_digested(self):
+        importer.import_posts(ndjson(
+            self.post("Out", status="published"),
+            self.post("Also out", status="published"),
+            self.post("Draft"),
+        ), importer.FixedAuthor(self.author.pk))
+
+        published = Post.objects.filter(status="published").values_list("id", flat=True)
+        self.assertCountEqual([call.args[0] for call in self.fan_out.call_args_list], published)
+        self.notify.assert_called_once_with(self.author.pk, 2)
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog_app import like_state, member_sets
+from blog_app.authentication import load_identity
+from blog_app.models import Author, Like, Post, User
+
+from .base import IsolatedServicesMixin
+
+
+@override_settings(THROTTLE_BUCKETS={})
+class ConcurrentLikeTests(IsolatedServicesMixin, TransactionTestCase):
+    """Repeated taps from many threads leave one like per user and a matching like_count."""
+
+    THREADS = 16
+    USERS = 50
+    TAPS = 4
+
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(user=User.objects.create(username="like_author", role="author"), bio="")
+        self.post = Post.objects.create(author=author, title="Liked", content="", status="published")
+        self.users = User.objects.bulk_create([User(username=f"like_user_{i}") for i in range(self.USERS)])
+
+    def hammer(self, send):
+        def request(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                return send(client).status_code
+            finally:
+                # Each thread has its own connection; the test database cannot be dropped while it is open
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            return list(pool.map(request, [user for user in self.users for _ in range(self.TAPS)]))
+
+    def test_concurrent_likes_and_unlikes(self):
+        like_url = reverse("like_post", kwargs={"post_id": self.post.pk})
+        unlike_url = reverse("unlike_post", kwargs={"post_id": self.post.pk})
+
+        codes = self.hammer(lambda client: client.post(like_url))
+        self.assertEqual(codes.count(201), self.USERS)
+        self.assertEqual(codes.count(400), self.USERS * (self.TAPS - 1))
+        self.post.refresh_from_db()
+        self.assertEqual(Like.objects.filter(post=self.post).count(), self.USERS)
+        self.assertEqual(self.post.like_count, self.USERS)
+
+        codes = self.hammer(lambda client: client.delete(unlike_url))
+        self.assertEqual(codes.count(204), self.USERS)
+        self.assertEqual(codes.count(400), self.USERS * (self.TAPS - 1))
+        self.post.refresh_from_db()
+        self.assertFalse(Like.objects.filter(post=self.post).exists())
+        self.assertEqual(self.post.like_count, 0)
+
+
+class LikeStateTests(IsolatedServicesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author_user = User.objects.create(username="state_author", role="author")
+        author = Author.objects.create(user=cls.author_user, bio="")
+        cls.reader = User.objects.create(username="state_reader", role="reader")
+        cls.published, cls.draft = Post.objects.bulk_create([
+            Post(author=author, title="Out", content="", status="published"),
+            Post(author=author, title="Draft", content="", status="draft"),
+        ])
+        Like.objects.bulk_create([Like(post=post, user=cls.reader) for post in (cls.published, cls.draft)])
+
+    def test_states_are_rebuilt_then_written_through(self):
+        post_id = self.published.pk
+        self.assertEqual(like_state.get_states([post_id], self.reader.pk), {
+            post_id: {"liked_by_me": True, "like_count": 1},
+        })
+        like_state.record_like(post_id, self.author_user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(like_state.get_states([post_id], self.author_user.pk), {
+                post_id: {"liked_by_me": True, "like_count": 2},
+            })
+
+    def test_drafts_are_only_answered_for_their_author_and_never_cached(self):
+        self.assertEqual(like_state.get_states([self.draft.pk], self.reader.pk), {})
+        self.assertEqual(like_state.get_states([self.draft.pk], self.author_user.pk), {
+            self.draft.pk: {"liked_by_me": False, "like_count": 1},
+        })
+        self.assertFalse(self.redis.exists(like_state.state_key(self.draft.pk)))
+
+    def test_rebuild_does_not_drop_a_racing_like(self):
+        post_id = self.published.pk
+        install = member_sets.install
+
+        def like_then_install(*args):
+            # The like commits after the rebuild's query and is written through before the rebuilt set lands
+            Like.objects.create(post=self.published, user=self.author_user)
+            like_state.record_like(post_id, self.author_user.pk)
+            install(*args)
+
+        with mock.patch.object(member_sets, "install", like_then_install):
+            like_state.get_states([post_id], self.reader.pk)
+        self.assertEqual(like_state.get_states([post_id], self.author_user.pk), {
+            post_id: {"liked_by_me": True, "like_count": 2},
+        })
+
+    def test_deleted_posts_are_forgotten(self):
+        like_state.get_states([self.published.pk], self.reader.pk)
+        client = APIClient()
+        client.force_authenticate(load_identity(self.author_user.pk))
+        self.assertEqual(client.delete(reverse("post_detail", kwargs={"pk": self.published.pk})).status_code, 204)
+        self.assertEqual(like_state.get_states([self.published.pk], self.reader.pk), {})
@@ -0,0 +1,181 @@
+import random
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog_app.authentication import load_identity
+from blog_app.models import Author, Comment, Follow, Like, Post, Reader, Tag, User
+from blog_app.serializers import PostSerializer
+
+from .base import IsolatedServicesMixin
+
+
+SORT_NODE = re.compile(r"^\s*(->\s*)?(Incremental )?Sort\b", re.MULTILINE)
+
+
+class QueryPlanTests(IsolatedServicesMixin, TestCase):
+    """EXPLAIN the main query of each hot view over a seeded dataset; an index is expected for each."""
+
+    POSTS = 20000
+    AUTHORS = 50
+    READERS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        users = User.objects.bulk_create(
+            [User(username=f"plan_author_{i}", role="author") for i in range(cls.AUTHORS)]
+            + [User(username=f"plan_reader_{i}", role="reader") for i in range(cls.READERS)]
+        )
+        authors = Author.objects.bulk_create([Author(user=u, bio="") for u in users[:cls.AUTHORS]])
+        readers = Reader.objects.bulk_create([Reader(user=u) for u in users[cls.AUTHORS:]])
+        posts = Post.objects.bulk_create([
+            Post(
+                author=rng.choice(authors),
+                title=f"Post {i}",
+                content="",
+                status=rng.choice(("draft", "published")),
+            )
+            for i in range(cls.POSTS)
+        ], batch_size=5000)
+        # The checks target a hot post and a popular author, as production traffic does
+        cls.post, cls.author, cls.user = posts[0], authors[0], users[0]
+        Comment.objects.bulk_create([
+            Comment(post=cls.post if i % 2 else rng.choice(posts), user=rng.choice(users), content="")
+            for i in range(cls.POSTS)
+        ], batch_size=5000)
+        Like.objects.bulk_create([
+            Like(post=rng.choice(posts), user=rng.choice(users)) for _ in range(cls.POSTS)
+        ], batch_size=5000, ignore_conflicts=True)
+        Follow.objects.bulk_create([
+            Follow(reader=reader, author=author)
+            for reader in readers
+            for author in {cls.author, *rng.sample(authors, k=min(10, len(authors)))}
+        ], batch_size=5000)
+        with connection.cursor() as cursor:
+            for model in (Post, Comment, Like, Follow):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def test_hot_queries_use_their_indexes(self):
+        # Each queryset mirrors the main query of the view it is named after, first page only
+        checks = [
+            ("post_list (reader)",
+             Post.objects.filter(status="published").order_by("-created_at", "-id")[:11],
+             Post._meta.db_table, "post_published_created_idx"),
+            ("post_list (author)",
+             Post.objects.filter(author=self.author).order_by("-created_at", "-id")[:11],
+             Post._meta.db_table, "post_author_created_idx"),
+            ("comment_list_create",
+             Comment.objects.filter(post=self.post).order_by("-created_at", "-id")[:11],
+             Comment._meta.db_table, "comment_post_created_idx"),
+            ("like_post",
+             Like.objects.filter(post=self.post, user=self.user).values("id")[:1],
+             Like._meta.db_table, "like_post_user_unique"),
+            ("get_author_followers",
+             Follow.objects.filter(author=self.author).order_by("-created_at", "-id")[:11],
+             Follow._meta.db_table, "follow_author_created_idx"),
+        ]
+        for name, queryset, table, index in checks:
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertNotIn(f"Seq Scan on {table}", plan)
+                self.assertIsNone(SORT_NODE.search(plan), plan)
+                self.assertIn(index, plan)
+
+
+class QueryBudgetTests(IsolatedServicesMixin, TestCase):
+    """Every list and detail endpoint issues a fixed number of queries, however many related rows it returns."""
+
+    ROWS = 25
+
+    # (label, url name, url kwargs, acting user, query params, queries)
+    # Counts exclude authentication: the client is forced to the identity that
+    # ProfileJWTAuthentication would load. Detail and comment reads spend one query on
+    # their ETag validators; post_list takes its validators from the page it loaded.
+    BUDGETS = [
+        ("author_list", "author_list", {}, "author", {}, 1),
+        ("author_detail", "author_detail", {"pk": "author"}, "author", {}, 1),
+        ("reader_list", "reader_list", {}, "reader", {}, 1),
+        ("reader_detail", "reader_detail", {"pk": "reader"}, "reader", {}, 1),
+        ("post_list (page)", "post_list", {}, "reader", {}, 2),
+        ("post_list (cursor)", "post_list", {}, "reader", {"pagination": "cursor"}, 1),
+        ("post_detail", "post_detail", {"pk": "post"}, "reader", {}, 2),
+        ("comment_list_create", "comment_list_create", {"post_pk": "post"}, "reader", {}, 2),
+        ("comment_detail", "comment_detail", {"post_pk": "post", "comment_pk": "comment"}, "reader", {}, 1),
+        ("get_likes", "get_likes", {"post_id": "post"}, "reader", {}, 2),
+        ("get_author_followers", "get_author_followers", {"author_id": "author"}, "reader", {}, 2),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author_user = User.objects.create(username="budget_author", role="author")
+        cls.reader_user = User.objects.create(username="budget_reader", role="reader")
+        cls.author = Author.objects.create(user=cls.author_user, bio="")
+        cls.reader = Reader.objects.create(user=cls.reader_user)
+
+        others = User.objects.bulk_create([
+            User(username=f"budget_user_{i}", role="reader" if i % 2 else "author") for i in range(cls.ROWS)
+        ])
+        Author.objects.bulk_create([Author(user=u, bio="") for u in others if u.role == "author"])
+        other_readers = Reader.objects.bulk_create([Reader(user=u) for u in others if u.role == "reader"])
+
+        posts = Post.objects.bulk_create([
+            Post(author=cls.author, title=f"Post {i}", content="", status="published") for i in range(cls.ROWS)
+        ])
+        cls.post = posts[0]
+        cls.comment = Comment.objects.bulk_create([Comment(post=cls.post, user=u, content="") for u in others])[0]
+        Like.objects.bulk_create([Like(post=cls.post, user=u) for u in others])
+        Follow.objects.bulk_create([Follow(reader=r, author=cls.author) for r in [cls.reader, *other_readers]])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_read_endpoints_stay_within_budget(self):
+        for label, url_name, kwargs, actor, params, queries in self.BUDGETS:
+            with self.subTest(label):
+                url = reverse(url_name, kwargs={k: getattr(self, v).pk for k, v in kwargs.items()})
+                self.client.force_authenticate(load_identity(getattr(self, f"{actor}_user").pk))
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+
+
+class TagWriteQueryTests(IsolatedServicesMixin, TestCase):
+    """Writing a post's tags costs the same number of queries however many tags it has."""
+
+    # Create: the savepoint pair, the tag lookup, the insert and re-read of new names, the
+    # post insert, the through-row insert and two search vector refreshes. Update (every
+    # name exists by then): the savepoint pair, the tag lookup, the post update, the
+    # stale-link delete, the through-row insert and two search vector refreshes
+    CREATE_QUERIES = 9
+    UPDATE_QUERIES = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(user=User.objects.create(username="tag_author", role="author"), bio="")
+
+    def tag_data(self, count):
+        existing = Tag.objects.bulk_create([Tag(name=f"tag_{count}_{i}") for i in range(count)])
+        tags = [str(tag.id) for tag in existing] + [f"new_tag_{count}_{i}" for i in range(count)]
+        return {"title": "Tagged", "content": "Body", "status": "published", "tags": tags}
+
+    def test_create_and_update_queries_do_not_grow_with_tags(self):
+        for count in (1, 25):
+            with self.subTest(tags=count * 2):
+                data = self.tag_data(count)
+                serializer = PostSerializer(data=data)
+                serializer.is_valid(raise_exception=True)
+                with self.assertNumQueries(self.CREATE_QUERIES):
+                    post = serializer.save(author=self.author)
+                self.assertEqual(post.tags.count(), len(data["tags"]))
+
+                data["tags"] = data["tags"][::2]
+                serializer = PostSerializer(post, data=data)
+                serializer.is_valid(raise_exception=True)
+                with self.assertNumQueries(self.UPDATE_QUERIES):
+                    serializer.save()
+                self.assertEqual(post.tags.count(), len(data["tags"]))
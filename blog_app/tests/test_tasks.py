@@ -0,0 +1,86 @@
+import uuid
+
+from django.core import mail
+from django.test import SimpleTestCase, TestCase
+
+from blog_app import comment_digest
+from blog_app.models import Author, Follow, Post, Reader, User
+from blog_app.tasks import deliver_post_digest, send_comment_digests
+
+from .base import IsolatedServicesMixin
+
+
+class PostDigestTests(IsolatedServicesMixin, TestCase):
+    def test_digest_is_mailed_to_followers(self):
+        author = Author.objects.create(user=User.objects.create(username="digest_author", role="author"), bio="")
+        readers = Reader.objects.bulk_create([
+            Reader(user=User.objects.create(username=f"digest_reader_{i}", email=f"reader{i}@example.com"))
+            for i in range(3)
+        ])
+        follows = Follow.objects.bulk_create([Follow(reader=reader, author=author) for reader in readers])
+
+        deliver_post_digest.apply(args=(author.id, 5, uuid.uuid4().hex, 0, follows[-1].id))
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f"reader{i}@example.com" for i in range(3)])
+        self.assertEqual(mail.outbox[0].subject, "digest_author published 5 new posts")
+
+
+class CommentDigestTaskTests(IsolatedServicesMixin, TestCase):
+    def test_one_digest_per_author_and_nothing_left_pending(self):
+        user = User.objects.create(username="commented_author", email="author@example.com", role="author")
+        author = Author.objects.create(user=user, bio="")
+        post = Post.objects.create(author=author, title="Hello", content="", status="published")
+        for _ in range(3):
+            comment_digest.record(author.id, post.id)
+
+        self.assertEqual(send_comment_digests.apply().get(), 1)
+        self.assertEqual(mail.outbox[0].subject, "3 new comments on your posts")
+        self.assertEqual(send_comment_digests.apply().get(), 0)
+        self.assertFalse(self.redis.exists(comment_digest.PROCESSING_AUTHORS_KEY, comment_digest.LOCK_KEY))
+
+
+class CommentDigestBufferTests(IsolatedServicesMixin, SimpleTestCase):
+    AUTHOR_ID = 1
+
+    def test_failed_send_keeps_the_claimed_counts(self):
+        for post_id in (1, 1, 2):
+            comment_digest.record(self.AUTHOR_ID, post_id)
+        self.assertEqual(comment_digest.snapshot(), 1)
+        pending = comment_digest.pending()
+        self.assertEqual(pending, {self.AUTHOR_ID: {1: 2, 2: 1}})
+
+        # A comment recorded mid-run belongs to the next window, not to this batch or its retry
+        comment_digest.record(self.AUTHOR_ID, 1)
+        self.assertEqual(comment_digest.pending(), pending)
+
+        comment_digest.acknowledge(pending)
+        self.assertEqual(comment_digest.pending(), {})
+        self.assertEqual(comment_digest.snapshot(), 1)
+        self.assertEqual(comment_digest.pending(), {self.AUTHOR_ID: {1: 1}})
+
+    def test_a_steady_comment_stream_does_not_keep_a_run_going(self):
+        comment_digest.record(self.AUTHOR_ID, 1)
+        comment_digest.snapshot()
+        batches = 0
+        while pending := comment_digest.pending():
+            batches += 1
+            comment_digest.record(self.AUTHOR_ID, 1)
+            comment_digest.acknowledge(pending)
+        self.assertEqual(batches, 1)
+
+    def test_overlapping_runs_are_skipped(self):
+        comment_digest.record(self.AUTHOR_ID, 1)
+        token = comment_digest.lock()
+        self.assertIsNone(comment_digest.lock())
+        self.assertEqual(send_comment_digests.apply().get(), 0)
+        self.assertTrue(self.redis.sismember(comment_digest.PENDING_AUTHORS_KEY, self.AUTHOR_ID))
+
+        comment_digest.unlock(token)
+        self.assertIsNotNone(comment_digest.lock())
+
+    def test_retracted_comments_are_not_digested(self):
+        for post_id in (1, 1, 2):
+            comment_digest.record(self.AUTHOR_ID, post_id)
+        comment_digest.retract(self.AUTHOR_ID, 1, 2)
+        comment_digest.snapshot()
+        self.assertEqual(comment_digest.pending(), {self.AUTHOR_ID: {2: 1}})
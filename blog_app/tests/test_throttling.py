@@ -0,0 +1,75 @@
+import redis
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog_app import redis_client, throttling
+from blog_app.authentication import load_identity
+from blog_app.models import Author, Post, User
+
+from .base import IsolatedServicesMixin
+
+
+class ThrottleStateMixin(IsolatedServicesMixin):
+    def setUp(self):
+        super().setUp()
+        for name, initial in (("_bucket_script", None), ("_redis_down_until", 0.0)):
+            setattr(throttling, name, initial)
+            self.addCleanup(setattr, throttling, name, initial)
+        throttling._local.clear()
+        self.addCleanup(throttling._local.clear)
+
+
+class BucketTests(ThrottleStateMixin, SimpleTestCase):
+    RATE = throttling.parse_rate("1/min")
+
+    def test_redis_bucket_allows_the_burst_then_waits_for_a_refill(self):
+        key = throttling.bucket_key("like", 1)
+        self.assertEqual(throttling.take(key, 2, self.RATE), (True, 0.0))
+        self.assertEqual(throttling.take(key, 2, self.RATE), (True, 0.0))
+        allowed, wait = throttling.take(key, 2, self.RATE)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 60, delta=1)
+        self.assertTrue(self.redis.exists(key))
+        self.assertEqual(throttling._local, {})
+
+    def test_unreachable_redis_falls_back_to_local_buckets(self):
+        # Nothing listens on port 1, so the script call fails to connect
+        self.replace_client(redis_client, "_client", redis.Redis(host="127.0.0.1", port=1))
+        key = throttling.bucket_key("like", 1)
+        self.assertEqual(throttling.take(key, 1, self.RATE), (True, 0.0))
+        self.assertIn(key, throttling._local)
+        self.assertFalse(throttling.take(key, 1, self.RATE)[0])
+
+        # Redis is left alone until the retry interval has passed
+        self.replace_client(redis_client, "_client", self.redis)
+        self.assertFalse(throttling.take(key, 1, self.RATE)[0])
+        self.assertFalse(self.redis.exists(key))
+
+        throttling._redis_down_until = 0.0
+        self.assertEqual(throttling.take(key, 1, self.RATE), (True, 0.0))
+        self.assertTrue(self.redis.exists(key))
+
+
+@override_settings(THROTTLE_BUCKETS={"like": {"reader": (1, "1/min")}})
+class ThrottledViewTests(ThrottleStateMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="throttled_reader", role="reader")
+        author = Author.objects.create(user=User.objects.create(username="throttled_author", role="author"), bio="")
+        cls.posts = Post.objects.bulk_create([
+            Post(author=author, title=f"Throttled {i}", content="", status="published") for i in range(2)
+        ])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(load_identity(self.reader.pk))
+
+    def test_empty_bucket_answers_429_with_retry_after(self):
+        first, second = (reverse("like_post", kwargs={"post_id": post.pk}) for post in self.posts)
+        self.assertEqual(self.client.post(first).status_code, 201)
+
+        response = self.client.post(second)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response["Retry-After"]), range(59, 61))
@@ -0,0 +1,165 @@
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog_app.authentication import load_identity
+from blog_app.models import Author, Comment, Post, Reader, User
+
+from .base import IsolatedServicesMixin
+
+
+@override_settings(THROTTLE_BUCKETS={})
+class ConditionalRequestTests(IsolatedServicesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="etag_reader", role="reader")
+        author = Author.objects.create(user=User.objects.create(username="etag_author", role="author"), bio="")
+        cls.post = Post.objects.create(author=author, title="Cached", content="Body", status="published")
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(load_identity(self.reader.pk))
+
+    def test_unchanged_post_list_page_is_not_modified(self):
+        first = self.client.get(reverse("post_list"), {"pagination": "cursor"})
+        again = self.client.get(reverse("post_list"), {"pagination": "cursor"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self.client.post(reverse("like_post", kwargs={"post_id": self.post.pk}))
+        changed = self.client.get(reverse("post_list"), {"pagination": "cursor"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_like_replaces_cached_post_body(self):
+        url = reverse("post_detail", kwargs={"pk": self.post.pk})
+        self.assertEqual(self.client.get(url).data["like_count"], 0)
+        self.client.post(reverse("like_post", kwargs={"post_id": self.post.pk}))
+        response = self.client.get(url)
+        self.assertEqual((response["X-Cache"], response.data["like_count"]), ("MISS", 1))
+
+        self.client.delete(reverse("unlike_post", kwargs={"post_id": self.post.pk}))
+        response = self.client.get(url)
+        self.assertEqual((response["X-Cache"], response.data["like_count"]), ("MISS", 0))
+
+    def test_if_modified_since_never_hides_a_new_like(self):
+        url = reverse("post_detail", kwargs={"pk": self.post.pk})
+        first = self.client.get(url)
+        self.assertNotIn("Last-Modified", first)
+
+        self.client.post(reverse("like_post", kwargs={"post_id": self.post.pk}))
+        since = http_date(self.post.updated_at.timestamp() + 60)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+
+class IdentityInvalidationTests(IsolatedServicesMixin, TestCase):
+    # Nothing listens on port 1, so every cache call fails to connect
+    DOWN_CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:1/0"},
+    }
+
+    def test_profile_writes_survive_an_unreachable_cache(self):
+        for timeout in (0, 60):
+            cache_settings = self.settings(CACHES=self.DOWN_CACHES, AUTH_PROFILE_CACHE_TIMEOUT=timeout)
+            with self.subTest(timeout=timeout), cache_settings:
+                user = User.objects.create(username=f"identity_{timeout}", role="reader")
+                Reader.objects.create(user=user)
+                user.delete()
+
+
+class MetricsAccessTests(IsolatedServicesMixin, SimpleTestCase):
+    def test_metrics_need_a_configured_token(self):
+        url = reverse("prometheus_metrics")
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        with self.settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get(url).status_code, 401)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+
+class HomeFeedCursorTests(IsolatedServicesMixin, TestCase):
+    def test_non_finite_cursor_is_rejected(self):
+        user = User.objects.create(username="feed_reader", role="reader")
+        Reader.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(load_identity(user.pk))
+        for before in ("nan", "inf", "-inf", "later"):
+            with self.subTest(before=before):
+                response = self.client.get(reverse("home_feed"), {"before": before})
+                self.assertEqual(response.status_code, 400)
+
+
+class CommentCounterTests(IsolatedServicesMixin, TestCase):
+    def test_moving_a_comment_moves_its_count(self):
+        user = User.objects.create(username="comment_user", role="reader")
+        author = Author.objects.create(user=User.objects.create(username="comment_author", role="author"), bio="")
+        source, target = Post.objects.bulk_create([
+            Post(author=author, title="Source", content="", status="published", comment_count=1),
+            Post(author=author, title="Target", content="", status="published"),
+        ])
+        comment = Comment.objects.create(post=source, user=user, content="Hi")
+        self.client = APIClient()
+        self.client.force_authenticate(load_identity(user.pk))
+
+        url = reverse("comment_detail", kwargs={"post_pk": source.pk, "comment_pk": comment.pk})
+        response = self.client.put(url, {"post": target.pk, "content": "Moved"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        source.refresh_from_db()
+        target.refresh_from_db()
+        self.assertEqual((source.comment_count, target.comment_count), (0, 1))
+
+
+class AsyncReadViewTests(IsolatedServicesMixin, TestCase):
+    """The async views answer like their sync counterparts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="async_reader", role="reader")
+        author = Author.objects.create(user=User.objects.create(username="async_author", role="author"), bio="")
+        cls.post, cls.draft = Post.objects.bulk_create([
+            Post(author=author, title="Async", content="Body", status="published", comment_count=3),
+            Post(author=author, title="Hidden", content="Body", status="draft"),
+        ])
+        Comment.objects.bulk_create([Comment(post=cls.post, user=cls.reader, content=f"#{i}") for i in range(3)])
+
+    def setUp(self):
+        super().setUp()
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.reader).access_token}"}
+
+    async def get_both(self, sync_name, params=None, **kwargs):
+        """GET the async view first, so it reads the body itself, then the sync view."""
+        async_name = {"comment_list_create": "async_comment_list"}.get(sync_name, f"async_{sync_name}")
+        response = await self.async_client.get(reverse(async_name, kwargs=kwargs), params, headers=self.headers)
+        sync = await sync_to_async(self.client.get)(reverse(sync_name, kwargs=kwargs), params, headers=self.headers)
+        return sync, response
+
+    async def test_post_detail(self):
+        sync, response = await self.get_both("post_detail", pk=self.post.pk)
+        self.assertEqual((response.status_code, response["X-Cache"], sync["X-Cache"]), (200, "MISS", "HIT"))
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(response["ETag"], sync["ETag"])
+
+        not_modified = await self.async_client.get(
+            reverse("async_post_detail", kwargs={"pk": self.post.pk}),
+            headers={**self.headers, "If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        for pk, code in ((self.draft.pk, 403), (0, 404)):
+            with self.subTest(pk=pk):
+                sync, response = await self.get_both("post_detail", pk=pk)
+                self.assertEqual((response.status_code, sync.status_code), (code, code))
+
+    async def test_comment_list(self):
+        for params in ({}, {"pagination": "cursor", "page_size": 2}):
+            with self.subTest(params=params):
+                sync, response = await self.get_both("comment_list_create", params, post_pk=self.post.pk)
+                self.assertEqual((response.status_code, response["X-Cache"], sync["X-Cache"]), (200, "MISS", "HIT"))
+                self.assertEqual(response.json(), sync.json())
+
+        sync, response = await self.get_both("comment_list_create", post_pk=0)
+        self.assertEqual((response.status_code, sync.status_code), (404, 404))
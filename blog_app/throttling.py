@@ -0,0 +1,139 @@
+"""
+Token-bucket throttling for the write endpoints.
+
+Each (endpoint scope, user) pair has a bucket of ``burst`` tokens that refills at the
+sustained rate configured in ``THROTTLE_BUCKETS`` for the user's role. A request takes
+one token; an empty bucket means HTTP 429 with ``Retry-After`` set to the time until
+the next token.
+
+Buckets live in Redis and are checked with one Lua script, so a check is a single
+atomic round trip. The script reads the time from Redis, so app servers with skewed
+clocks agree. If Redis is unreachable, buckets fall back to this process's memory for
+``THROTTLE_REDIS_RETRY_INTERVAL`` seconds before Redis is tried again. The fallback
+limits each process separately, so a client gets more through until Redis is back.
+"""
+import threading
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .redis_client import get_redis
+
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Refill by elapsed time, then take a token if one is left. Returns {allowed, seconds to wait}.
+BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed, wait = 0, (1 - tokens) / rate
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed, wait = 1, 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+# Local buckets beyond this many are pruned of the ones that have refilled completely
+LOCAL_MAX_BUCKETS = 10000
+
+_bucket_script = None
+_redis_down_until = 0.0
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """ "60/min" -> tokens per second."""
+    count, period = rate.split("/")
+    return int(count) / PERIODS[period[0]]
+
+
+def bucket_key(scope, ident):
+    return f"throttle:{scope}:{ident}"
+
+
+def _take_redis(key, capacity, rate):
+    global _bucket_script
+    client = get_redis()
+    if _bucket_script is None:
+        _bucket_script = client.register_script(BUCKET_SCRIPT)
+    allowed, wait = _bucket_script(keys=[key], args=[capacity, rate], client=client)
+    return bool(allowed), float(wait)
+
+
+def _take_local(key, capacity, rate):
+    now = time.monotonic()
+    with _local_lock:
+        tokens, ts = _local.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+        if tokens >= 1:
+            _local[key] = (tokens - 1, now)
+            allowed, wait = True, 0.0
+        else:
+            _local[key] = (tokens, now)
+            allowed, wait = False, (1 - tokens) / rate
+        if len(_local) > LOCAL_MAX_BUCKETS:
+            for stale in [k for k, (t, at) in _local.items() if t + (now - at) * rate >= capacity]:
+                del _local[stale]
+    return allowed, wait
+
+
+def take(key, capacity, rate):
+    """Take one token from the bucket at ``key``; returns ``(allowed, seconds until a token is free)``."""
+    global _redis_down_until
+    if time.monotonic() >= _redis_down_until:
+        try:
+            return _take_redis(key, capacity, rate)
+        except RedisError:
+            _redis_down_until = time.monotonic() + settings.THROTTLE_REDIS_RETRY_INTERVAL
+    return _take_local(key, capacity, rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Limits unsafe requests per user and ``scope``; safe methods on the same view pass freely."""
+    scope = None
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        user = request.user
+        role = user.role if user and user.is_authenticated else "anon"
+        limit = settings.THROTTLE_BUCKETS.get(self.scope, {}).get(role)
+        if limit is None:
+            return True
+        burst, rate = limit
+        ident = user.pk if user and user.is_authenticated else self.get_ident(request)
+        allowed, self._wait = take(bucket_key(self.scope, ident), burst, parse_rate(rate))
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LikeThrottle(TokenBucketThrottle):
+    scope = "like"
+
+
+class CommentThrottle(TokenBucketThrottle):
+    scope = "comment"
+
+
+class FollowThrottle(TokenBucketThrottle):
+    scope = "follow"
+
+
+class PostCreateThrottle(TokenBucketThrottle):
+    scope = "post_create"
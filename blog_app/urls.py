@@ -3,15 +3,18 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from . import async_views
 from .views import (
     RegisterView,
     author_list,
     author_view,
+    author_export,
     reader_list,
     reader_view,
     tag_list,
     tag_view,
     post_create,
+    post_import,
     post_view,
     post_list,
     comment_list_create,
@@ -19,9 +22,14 @@ from .views import (
     like_post,
     unlike_post,
     get_likes,
+    like_states,
     follow_author,
     get_author_followers,
+    following_states,
     unfollow_author,
+    home_feed,
+    db_connection_metrics,
+    prometheus_metrics,
     PasswordResetView,
     password_reset_confirm
 )
@@ -39,6 +47,7 @@ urlpatterns = [
     # Author URLs
     path("api/authors/", author_list, name="author_list"),
     path("api/authors/<int:pk>/", author_view, name="author_detail"),
+    path("api/authors/<int:pk>/export/<str:dataset>.<str:fmt>", author_export, name="author_export"),
 
     # Reader URLs
     path("api/readers/", reader_list, name="reader_list"),
@@ -51,6 +60,7 @@ urlpatterns = [
     # Post URLs
     path("api/posts/", post_list, name="post_list"),
     path("api/posts/create/", post_create, name="post_create"),
+    path("api/posts/import/", post_import, name="post_import"),
     path("api/posts/<int:pk>/", post_view, name="post_detail"),
 
     # Comment URLs
@@ -61,9 +71,24 @@ urlpatterns = [
     path("api/posts/like/<int:post_id>/", like_post, name="like_post"),
     path("api/posts/unlike/<int:post_id>/", unlike_post, name="unlike_post"),
     path("api/posts/likes/<int:post_id>/", get_likes, name="get_likes"),
+    path("api/posts/likes/state/", like_states, name="like_states"),
 
     # Follow URLs
     path('authors/follow/<int:author_id>/', follow_author, name='follow_author'),
     path('authors/unfollow/<int:author_id>/', unfollow_author, name='unfollow_author'),
     path('authors/followers/<int:author_id>/', get_author_followers, name='get_author_followers'),
+    path('authors/following/', following_states, name='following_states'),
+
+    # Feed URLs
+    path("api/feed/", home_feed, name="home_feed"),
+
+    # Metrics URLs
+    path("api/metrics/db/", db_connection_metrics, name="db_connection_metrics"),
+    path("metrics", prometheus_metrics, name="prometheus_metrics"),
+
+    # Async read endpoints, for ASGI deployments
+    path("api/async/posts/", async_views.post_list, name="async_post_list"),
+    path("api/async/posts/<int:pk>/", async_views.post_detail, name="async_post_detail"),
+    path("api/async/posts/<int:post_pk>/comments", async_views.comment_list, name="async_comment_list"),
+    path("api/async/posts/likes/<int:post_id>/", async_views.get_likes, name="async_get_likes"),
 ]
@@ -1,9 +1,11 @@
+import math
+
 from rest_framework import status
 from rest_framework.response import Response
 from .permissions import IsAuthor, IsReader, IsAuthorOrReadOnly
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from .models import *
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from .serializers import (
     UserSerializer,
     AuthorSerializer,
@@ -15,9 +17,24 @@ from .serializers import (
     FollowSerializer
 )
 from rest_framework.generics import CreateAPIView
-from django.db.models import Q
-from .tasks import notify_author_of_new_comment, notify_readers_of_new_post
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+from .authentication import author_profile, reader_profile
+from .importer import FixedAuthor, import_posts
+from .search import search_posts, get_search_mode
+from .throttling import CommentThrottle, FollowThrottle, LikeThrottle, PostCreateThrottle
+from .tasks import notify_readers_of_new_post, fan_out_post_to_feeds
+from . import (
+    comment_digest, conditional, counters, db_metrics, export, feed, follows, instrumentation, like_state, likes,
+    response_cache, task_metrics,
+)
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Count, Max
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from redis.exceptions import RedisError
+from .pagination import KeysetPagination, get_post_paginator, use_cursor_pagination
 
 
 class RegisterView(CreateAPIView):
@@ -29,7 +46,7 @@ class RegisterView(CreateAPIView):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAuthor])
 def author_list(request):
-    authors = Author.objects.all()
+    authors = AuthorSerializer.setup_eager_loading(Author.objects.all())
     serializer = AuthorSerializer(authors, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -38,7 +55,7 @@ def author_list(request):
 @permission_classes([IsAuthenticated, IsAuthor])
 def author_view(request, pk):
     try:
-        author = Author.objects.get(pk=pk)
+        author = AuthorSerializer.setup_eager_loading(Author.objects.all()).get(pk=pk)
         if author.user != request.user:
             return Response(status=status.HTTP_403_FORBIDDEN)
     except Author.DoesNotExist:
@@ -57,11 +74,28 @@ def author_view(request, pk):
         return Response(status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAuthor])
+def author_export(request, pk, dataset, fmt):
+    if dataset not in export.DATASETS or fmt not in export.FORMATS:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    author = Author.objects.filter(pk=pk).values('user_id').first()
+    if author is None:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    if author['user_id'] != request.user.pk:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    fields, values = export.rows(dataset, pk)
+    response = StreamingHttpResponse(export.encode(fmt, fields, values), content_type=export.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="author-{pk}-{dataset}.{fmt}"'
+    return response
+
+
 # Reader views
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsReader])
 def reader_list(request):
-    readers = Reader.objects.all()
+    readers = ReaderSerializer.setup_eager_loading(Reader.objects.all())
     serializer = ReaderSerializer(readers, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -70,7 +104,7 @@ def reader_list(request):
 @permission_classes([IsAuthenticated, IsReader])
 def reader_view(request, pk):
     try:
-        reader = Reader.objects.get(pk=pk)
+        reader = ReaderSerializer.setup_eager_loading(Reader.objects.all()).get(pk=pk)
         if reader.user != request.user:
             return Response(status=status.HTTP_403_FORBIDDEN)
     except Reader.DoesNotExist:
@@ -128,62 +162,133 @@ def tag_view(request, pk):
 @api_view(["GET", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated, IsAuthorOrReadOnly])
 def post_view(request, pk):
+    if request.method == "GET":
+        return post_detail(request, pk)
+
     try:
-        post = Post.objects.get(pk=pk)
+        post = PostSerializer.setup_eager_loading(Post.objects.all()).get(pk=pk)
 
         # Restrict access to drafts for non-authors
-        if post.status == 'draft' and post.author.user != request.user:
+        if post.status == 'draft' and post.author.user_id != request.user.pk:
             return Response({"detail": "You do not have permission to view this draft."},
                             status=status.HTTP_403_FORBIDDEN)
 
     except Post.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    if request.method == "GET":
-        serializer = PostSerializer(post)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    elif request.method == "PUT":
-        if post.author.user != request.user:
+    if request.method == "PUT":
+        if post.author.user_id != request.user.pk:
             return Response({"detail": "You do not have permission to edit this post."},
                             status=status.HTTP_403_FORBIDDEN)
 
+        was_published = post.status == 'published'
         serializer = PostSerializer(post, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            post = serializer.save()
+            response_cache.bump(post.id)
+            if was_published and post.status != 'published':
+                like_state.forget(post.id)
+            if post.status == 'published' and not was_published:
+                fan_out_post_to_feeds.delay(post.id)
+                notify_readers_of_new_post.delay(post.author_id, post.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "DELETE":
-        if post.author.user != request.user:
+        if post.author.user_id != request.user.pk:
             return Response({"detail": "You do not have permission to delete this post."},
                             status=status.HTTP_403_FORBIDDEN)
 
         post.delete()
+        response_cache.bump(pk)
+        like_state.forget(pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# post_detail and comment_list are also served by async_views; both versions share these helpers
+
+def post_detail_values(pk):
+    """Validators, visibility and existence come from one query that skips the post body."""
+    return Post.objects.filter(pk=pk).values(
+        'id', 'status', 'updated_at', 'like_count', 'comment_count', 'author__user_id'
+    )
+
+
+def post_detail_denial(request, values):
+    """``(status, data)`` to answer with when the post is missing or a draft of another author, else None."""
+    if values is None:
+        return status.HTTP_404_NOT_FOUND, None
+    # Restrict access to drafts for non-authors
+    if values['status'] == 'draft' and values['author__user_id'] != request.user.pk:
+        return status.HTTP_403_FORBIDDEN, {"detail": "You do not have permission to view this draft."}
+    return None
+
+
+def post_detail_body(pk):
+    return PostSerializer.setup_eager_loading(Post.objects.using(response_cache.FILL_DB)).filter(pk=pk)
+
+
+def post_detail(request, pk):
+    values = post_detail_values(pk).first()
+    denial = post_detail_denial(request, values)
+    if denial is not None:
+        code, data = denial
+        return Response(data, status=code)
+
+    etag = conditional.post_detail_validators(values)
+    not_modified = conditional.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    cache_key, cached = response_cache.get('post_detail', pk, request)
+    if cached is not None:
+        response = Response(cached, status=status.HTTP_200_OK, headers={'X-Cache': 'HIT'})
+        return conditional.apply(response, etag)
+
+    post = post_detail_body(pk).get()
+    serializer = PostSerializer(post)
+    if post.status == 'published':
+        response_cache.store(cache_key, serializer.data)
+    response = Response(serializer.data, status=status.HTTP_200_OK, headers={'X-Cache': 'MISS'})
+    return conditional.apply(response, etag)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated, IsAuthor])
+@throttle_classes([PostCreateThrottle])
 def post_create(request):
     if request.method == "POST":
         serializer = PostSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(author=request.user.author)
-            notify_readers_of_new_post.delay(request.user.id, request.data.content)
+            post = serializer.save(author=author_profile(request.user))
+            if post.status == 'published':
+                fan_out_post_to_feeds.delay(post.id)
+                notify_readers_of_new_post.delay(post.author_id, post.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def post_list(request):
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAuthor])
+def post_import(request):
+    if request.content_type.split(';')[0].strip() != 'application/x-ndjson':
+        return Response({"detail": "Expected an application/x-ndjson body."},
+                        status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    # Iterate the underlying HttpRequest so the body is streamed line by line, never buffered whole
+    summary = import_posts(request._request, FixedAuthor(author_profile(request.user).id))
+    return Response(summary, status=status.HTTP_201_CREATED)
+
+
+def filter_posts(request):
+    """The post_list queryset for this request; builds the query without running it."""
     if request.user.role == "author":
         # Authors see all their own posts, including drafts
-        posts = Post.objects.filter(author=request.user.author)
+        posts = Post.objects.filter(author=author_profile(request.user))
     else:
         # Readers see only published posts
         posts = Post.objects.filter(status='published')
+    posts = PostSerializer.setup_eager_loading(posts.order_by('-created_at', '-id'))
 
     # Filtering by tags
     tag_names = request.query_params.getlist('tags', None)
@@ -203,47 +308,99 @@ def post_list(request):
     # Search functionality
     search_query = request.query_params.get('search', None)
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query) |
-            Q(tags__name__icontains=search_query)
-        ).distinct()
-
-    paginator = PageNumberPagination()
-    paginator.page_size = 10
+        posts = search_posts(posts, search_query, get_search_mode(request))
+    return posts
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def post_list(request):
+    posts = filter_posts(request)
+    paginator = get_post_paginator(request)
     paginated_posts = paginator.paginate_queryset(posts, request)
+    etag = conditional.post_list_validators(request, paginator, paginated_posts)
+    not_modified = conditional.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+
     serializer = PostSerializer(paginated_posts, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    return conditional.apply(paginator.get_paginated_response(serializer.data), etag)
 
 
 #Comment Views
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([CommentThrottle])
 def comment_list_create(request, post_pk):
+    if request.method == "GET":
+        return comment_list(request, post_pk)
+
     try:
         post = Post.objects.get(pk=post_pk)
     except Post.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    if request.method == "GET":
-        comments = Comment.objects.filter(post=post)
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    elif request.method == "POST":
+    if request.method == "POST":
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
-            comment = serializer.save(user=request.user, post=post)
-            notify_author_of_new_comment.delay(post.id, comment.content)
+            with transaction.atomic():
+                comment = serializer.save(user=request.user, post=post)
+                counters.adjust(Post, post.pk, 'comment_count', 1)
+            response_cache.bump(post.pk)
+            comment_digest.record(post.author_id, post.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def comment_list_values(post_pk):
+    return Post.objects.filter(pk=post_pk).annotate(
+        last_comment=Max('comments__updated_at'), comment_rows=Count('comments')
+    ).values('id', 'status', 'last_comment', 'comment_rows')
+
+
+def comment_list_body(request, post_pk):
+    """The post's comments, and the paginator that pages them in cursor mode (None otherwise)."""
+    comments = CommentSerializer.setup_eager_loading(
+        Comment.objects.using(response_cache.FILL_DB).filter(post_id=post_pk)
+    )
+    return comments, KeysetPagination() if use_cursor_pagination(request) else None
+
+
+def comment_list_data(paginator, comments):
+    data = CommentSerializer(comments, many=True).data
+    return data if paginator is None else paginator.get_paginated_response(data).data
+
+
+def comment_list(request, post_pk):
+    values = comment_list_values(post_pk).first()
+    if values is None:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    etag = conditional.comment_list_validators(request, values)
+    not_modified = conditional.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    cache_key, cached = response_cache.get('comment_list', post_pk, request)
+    if cached is not None:
+        response = Response(cached, status=status.HTTP_200_OK, headers={'X-Cache': 'HIT'})
+        return conditional.apply(response, etag)
+
+    comments, paginator = comment_list_body(request, post_pk)
+    if paginator is not None:
+        comments = paginator.paginate_queryset(comments, request)
+    data = comment_list_data(paginator, comments)
+    if values['status'] == 'published':
+        response_cache.store(cache_key, data)
+    response = Response(data, status=status.HTTP_200_OK, headers={'X-Cache': 'MISS'})
+    return conditional.apply(response, etag)
+
+
 @api_view(["GET", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
 def comment_view(request, post_pk, comment_pk):
     try:
-        comment = Comment.objects.get(pk=comment_pk, post__pk=post_pk)
+        comment = CommentSerializer.setup_eager_loading(Comment.objects.all()).get(pk=comment_pk, post__pk=post_pk)
     except Comment.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -255,52 +412,60 @@ def comment_view(request, post_pk, comment_pk):
         if comment.user != request.user:
             return Response({"error": "You are not allowed to edit this comment"}, status=status.HTTP_403_FORBIDDEN)
 
+        previous_post_id = comment.post_id
         serializer = CommentSerializer(comment, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                # Moving a comment to another post moves it between the two posts' counters
+                if comment.post_id != previous_post_id:
+                    counters.adjust(Post, previous_post_id, 'comment_count', -1)
+                    counters.adjust(Post, comment.post_id, 'comment_count', 1)
+            response_cache.bump(previous_post_id)
+            if comment.post_id != previous_post_id:
+                response_cache.bump(comment.post_id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "DELETE":
         if comment.user != request.user:
             return Response({"error": "You are not allowed to delete this comment"}, status=status.HTTP_403_FORBIDDEN)
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            counters.adjust(Post, comment.post_id, 'comment_count', -1)
+        response_cache.bump(comment.post_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 #Like Views
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([LikeThrottle])
 def like_post(request, post_id):
-    try:
-        post = Post.objects.get(pk=post_id)
-    except Post.DoesNotExist:
+    post_exists, liked = likes.like(post_id, request.user.id)
+    if not post_exists:
         return Response({"detail": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
-
-    # Check if the post is already liked by the user
-    if Like.objects.filter(post=post, user=request.user).exists():
+    if not liked:
         return Response({"detail": "You have already liked this post"}, status=status.HTTP_400_BAD_REQUEST)
 
-    like = Like(post=post, user=request.user)
-    like.save()
-
+    like_state.record_like(post_id, request.user.id)
+    # like_count is part of the post's ETag, so its cached body must go too
+    response_cache.bump(post_id)
     return Response({"detail": "Post liked successfully"}, status=status.HTTP_201_CREATED)
 
 
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def unlike_post(request, post_id):
-    try:
-        post = Post.objects.get(pk=post_id)
-    except Post.DoesNotExist:
+    post_exists, unliked = likes.unlike(post_id, request.user.id)
+    if not post_exists:
         return Response({"detail": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
-
-    try:
-        like = Like.objects.get(post=post, user=request.user)
-        like.delete()
-        return Response({"detail": "Post unliked successfully"}, status=status.HTTP_204_NO_CONTENT)
-    except Like.DoesNotExist:
+    if not unliked:
         return Response({"detail": "You have not liked this post"}, status=status.HTTP_400_BAD_REQUEST)
 
+    like_state.record_unlike(post_id, request.user.id)
+    response_cache.bump(post_id)
+    return Response({"detail": "Post unliked successfully"}, status=status.HTTP_204_NO_CONTENT)
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -310,59 +475,142 @@ def get_likes(request, post_id):
     except Post.DoesNotExist:
         return Response({"detail": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    likes = Like.objects.filter(post=post)
+    likes = LikeSerializer.setup_eager_loading(Like.objects.filter(post=post))
     serializer = LikeSerializer(likes, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def like_states(request):
+    """Answer ``liked_by_me`` and ``like_count`` for up to 100 comma-separated post ``ids``."""
+    try:
+        post_ids = [int(value) for value in request.query_params.get("ids", "").split(",") if value]
+    except ValueError:
+        return Response({"detail": "ids must be a comma-separated list of post ids"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(post_ids) > like_state.MAX_POSTS:
+        return Response(
+            {"detail": f"At most {like_state.MAX_POSTS} post ids per request"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    states = like_state.get_states(post_ids, request.user.id)
+    results = [{"post_id": post_id, **states[post_id]} for post_id in dict.fromkeys(post_ids) if post_id in states]
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
 #Follow Views
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([FollowThrottle])
 def follow_author(request, author_id):
-    try:
-        reader = Reader.objects.get(user=request.user)
-        author = Author.objects.get(id=author_id)
-    except Reader.DoesNotExist:
+    reader_id, author_exists, follow = follows.follow(request.user.id, author_id)
+    if reader_id is None:
         return Response({"detail": "Reader profile not found."}, status=status.HTTP_404_NOT_FOUND)
-    except Author.DoesNotExist:
+    if not author_exists:
         return Response({"detail": "Author not found."}, status=status.HTTP_404_NOT_FOUND)
+    if follow is None:
+        return Response(
+            {"non_field_errors": ["You are already following this author."]}, status=status.HTTP_400_BAD_REQUEST
+        )
 
-    data = {'reader': reader.id, 'author': author.id}
-    serializer = FollowSerializer(data=data)
-    if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    follow_id, created_at = follow
+    feed.invalidate_timeline(reader_id)
+    serializer = FollowSerializer(Follow(id=follow_id, reader_id=reader_id, author_id=author_id, created_at=created_at))
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def unfollow_author(request, author_id):
-    try:
-        reader = Reader.objects.get(user=request.user)
-        author = Author.objects.get(id=author_id)
-        follow = Follow.objects.get(reader=reader, author=author)
-    except (Reader.DoesNotExist, Author.DoesNotExist, Follow.DoesNotExist):
+    reader_id, unfollowed = follows.unfollow(request.user.id, author_id)
+    if not unfollowed:
         return Response({"detail": "Follow relationship not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    follow.delete()
+    feed.invalidate_timeline(reader_id)
     return Response({"detail": "Unfollowed successfully."}, status=status.HTTP_204_NO_CONTENT)
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsReader])
+def following_states(request):
+    """Answer whether the reader follows each of up to 100 comma-separated author ``ids``."""
+    try:
+        author_ids = [int(value) for value in request.query_params.get("ids", "").split(",") if value]
+    except ValueError:
+        return Response({"detail": "ids must be a comma-separated list of author ids"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(author_ids) > follows.MAX_AUTHORS:
+        return Response(
+            {"detail": f"At most {follows.MAX_AUTHORS} author ids per request"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    reader = reader_profile(request.user)
+    if reader is None:
+        return Response({"detail": "Reader profile not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    states = follows.is_following(reader.id, author_ids)
+    results = [{"author_id": author_id, "following": following} for author_id, following in states.items()]
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_author_followers(request, author_id):
-    try:
-        author = Author.objects.get(id=author_id)
-    except Author.DoesNotExist:
+    if not Author.objects.filter(id=author_id).exists():
         return Response({"detail": "Author not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    followers = Follow.objects.filter(author=author)
-    serializer = FollowSerializer(followers, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Always paginated: popular authors have far too many followers for one response
+    followers = FollowSerializer.setup_eager_loading(Follow.objects.filter(author_id=author_id))
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(followers, request)
+    serializer = FollowSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+#Feed Views
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsReader])
+def home_feed(request):
+    reader = reader_profile(request.user)
+    if reader is None:
+        return Response({"detail": "Reader profile not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        before = float(request.query_params['before']) if 'before' in request.query_params else None
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+    except ValueError:
+        return Response({"detail": "Invalid feed cursor."}, status=status.HTTP_400_BAD_REQUEST)
+    # float() also accepts "nan" and "inf", which are not valid score bounds
+    if before is not None and not math.isfinite(before):
+        return Response({"detail": "Invalid feed cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+    post_ids, next_before = feed.get_feed_page(reader.id, limit, before)
+    posts = PostSerializer.setup_eager_loading(Post.objects.filter(id__in=post_ids, status='published')).in_bulk()
+    serializer = PostSerializer([posts[i] for i in post_ids if i in posts], many=True)
+    next_link = None
+    if next_before is not None:
+        next_link = replace_query_param(request.build_absolute_uri(), 'before', repr(next_before))
+    return Response({"next": next_link, "results": serializer.data}, status=status.HTTP_200_OK)
+
+
+#Metrics Views
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def db_connection_metrics(request):
+    return Response(db_metrics.stats(), status=status.HTTP_200_OK)
+
+
+@require_GET
+def prometheus_metrics(request):
+    """Request metrics of all workers for Prometheus; a plain view, so DRF's JWT check stays out of the way."""
+    # Without a configured token no credential can be right, so the endpoint stays closed
+    if not settings.METRICS_TOKEN:
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    if not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        body = instrumentation.render() + task_metrics.render_queue_depths()
+    except RedisError:
+        return HttpResponse("Metrics store unavailable\n", status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
-from django.template.loader import render_to_string
 from django.dispatch import receiver
 from rest_framework import generics
 from .signals import password_reset_requested
@@ -381,12 +629,11 @@ class PasswordResetView(generics.GenericAPIView):
 
 @receiver(password_reset_requested)
 def password_reset_email(sender, user, **kwargs):
-    subject = "Password Reset Requested"
     token = default_token_generator.make_token(user)
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     url = f"http://localhost:8000/api/password_reset/{uid}/{token}/"
-    message = render_to_string('password_reset_email.html', {'url': url, 'user': user})
-    send_password_reset_email.delay(subject, message ,user.email)
+    # Template rendering and delivery happen in the worker
+    send_password_reset_email.delay(user.pk, url)
 
 
 @api_view(["POST"])
@@ -42,17 +42,20 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework_simplejwt",
     "django_stubs_ext",
     'django_rest_passwordreset'
 ]
 
 MIDDLEWARE = [
+    "blog_app.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "blog_app.db_router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -91,22 +94,193 @@ DATABASES = {
         "PORT": os.getenv("DATABASE_PORT"),
     }
 }
+
+# How requests get their Postgres connection:
+#   "close"      - connect and disconnect on every request (Django's default)
+#   "persistent" - reuse a connection per thread for DATABASE_CONN_MAX_AGE seconds, health-checked before reuse
+#   "pool"       - a psycopg 3 pool per process, DATABASE_POOL_MIN_SIZE to DATABASE_POOL_MAX_SIZE connections,
+#                  waiting up to DATABASE_POOL_TIMEOUT seconds for a free one, each checked before it is handed out
+#   "pgbouncer"  - persistent connections to a PgBouncer in transaction pooling mode at DATABASE_HOST/PORT
+DATABASE_CONN_MODE = os.getenv('DATABASE_CONN_MODE', 'close')
+if DATABASE_CONN_MODE in ('persistent', 'pgbouncer'):
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if DATABASE_CONN_MODE == 'pgbouncer':
+    # Transaction pooling cannot keep a named cursor open across transactions
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif DATABASE_CONN_MODE == 'pool':
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+            "max_size": int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+            "timeout": float(os.getenv('DATABASE_POOL_TIMEOUT', 10)),
+        },
+    }
+    # Django then passes check=ConnectionPool.check_connection to the pool, so a connection the
+    # server dropped is replaced before it is handed out
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas: comma-separated host[:port] list, each added as a "replica_N" alias with the
+# primary's credentials. Safe requests read from them; see blog_app.db_router.
+DATABASE_REPLICAS = [replica for replica in os.getenv('DATABASE_REPLICAS', '').split(',') if replica]
+for index, replica in enumerate(DATABASE_REPLICAS):
+    host, _, port = replica.partition(':')
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["blog_app.db_router.PrimaryReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write, so they see their own changes
+READ_YOUR_WRITES_WINDOW = int(os.getenv('READ_YOUR_WRITES_WINDOW', 10))
+# Replicas further behind the primary than this many seconds are taken out of rotation
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DATABASE_REPLICA_MAX_LAG', 5))
+# How often each process re-measures replica lag, in seconds
+DATABASE_REPLICA_CHECK_INTERVAL = int(os.getenv('DATABASE_REPLICA_CHECK_INTERVAL', 10))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "blog_app.authentication.ProfileJWTAuthentication",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "blog_app.instrumentation.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
-CELERY_BROKER_URL = 'redis://redis:6379/0'
-CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
+# Write throttling (blog_app.throttling): scope -> role -> (burst, sustained rate). A user can send
+# `burst` requests at once, then one more per rate period; roles missing from a scope are not throttled.
+THROTTLE_BUCKETS = {
+    'like': {'reader': (30, '60/min'), 'author': (30, '60/min')},
+    'comment': {'reader': (10, '10/min'), 'author': (10, '10/min')},
+    'follow': {'reader': (20, '30/min'), 'author': (20, '30/min')},
+    'post_create': {'author': (5, '20/hour')},
+}
+# After a Redis error, throttling keeps buckets in process memory for this many seconds before retrying Redis
+THROTTLE_REDIS_RETRY_INTERVAL = int(os.getenv('THROTTLE_REDIS_RETRY_INTERVAL', 5))
+
+# Share of requests timed by blog_app.instrumentation (0 to 1); 0 removes the middleware
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', 1.0))
+# Send sampled requests' DB, cache and serialization timings back in a Server-Timing header
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+# Seconds between pushes of a process's request metrics to Redis, where /metrics reads them
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', 10))
+# Bearer token that /metrics requires; while it is unset /metrics answers 403 to everyone
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Seconds an authenticated user and its Author/Reader profile are cached; 0 loads them on every request
+AUTH_PROFILE_CACHE_TIMEOUT = int(os.getenv('AUTH_PROFILE_CACHE_TIMEOUT', 0))
+
+# "page" keeps ?page=N pagination on post_list; "cursor" switches list endpoints to keyset cursors.
+# Clients can also choose per request with ?pagination=page|cursor.
+PAGINATION_MODE = os.getenv('PAGINATION_MODE', 'page')
+
+# New-post notifications are delivered in chunks of this many followers, one Celery task per chunk
+NOTIFY_CHUNK_SIZE = int(os.getenv('NOTIFY_CHUNK_SIZE', 1000))
+
+# Comment notifications are coalesced into one digest per author per window (seconds)
+COMMENT_DIGEST_WINDOW = int(os.getenv('COMMENT_DIGEST_WINDOW', 300))
+# Longest a digest run may hold its lock (seconds) before a crashed run's lock is given up
+COMMENT_DIGEST_LOCK_TIMEOUT = int(os.getenv('COMMENT_DIGEST_LOCK_TIMEOUT', 3600))
+
+# Lifetime of a post's like set in Redis; it is rebuilt from Postgres when it expires
+LIKE_STATE_TTL = int(os.getenv('LIKE_STATE_TTL', 3600))
+
+# Lifetime of a follow graph set (a reader's followed authors or an author's followers) in Redis;
+# it is rebuilt from Postgres when it expires
+FOLLOW_GRAPH_TTL = int(os.getenv('FOLLOW_GRAPH_TTL', 3600))
+# "redis" shares the follow graph sets between processes; "local" keeps them in process memory for tests
+FOLLOW_GRAPH_BACKEND = os.getenv('FOLLOW_GRAPH_BACKEND', 'redis')
+
+# Post search: "fulltext" uses the indexed search_vector, "icontains" the old substring scan
+POST_SEARCH_MODE = os.getenv('POST_SEARCH_MODE', 'fulltext')
+
+# Application data (feeds, caches, counters) lives in its own Redis database, apart from the Celery broker
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/1')
+# Seconds the application client waits to connect and for a reply, so a stalled Redis fails
+# requests over to the throttle's local buckets instead of hanging them
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 1.0))
+
+# Caches: Redis in deployment, CACHE_BACKEND=locmem keeps everything in-process for tests and local runs
+if os.getenv('CACHE_BACKEND', 'redis') == 'locmem':
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+# Seconds a cached post detail / comment list response lives. Writes invalidate immediately;
+# the timeout bounds how stale like counts and author details inside a response can get.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60))
+
+# Home feed: timelines keep the newest FEED_MAX_LENGTH post ids per reader. Authors with at least
+# FEED_FANOUT_FOLLOWER_LIMIT followers are not pushed to timelines but merged in when the feed is read.
+FEED_MAX_LENGTH = int(os.getenv('FEED_MAX_LENGTH', 800))
+FEED_FANOUT_FOLLOWER_LIMIT = int(os.getenv('FEED_FANOUT_FOLLOWER_LIMIT', 10000))
+
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
+# Nothing reads task results; a task whose caller needs one must set ignore_result=False
+CELERY_TASK_IGNORE_RESULT = True
+
+# Queues, each consumed by its own worker with its own concurrency and prefetch (see docker-compose.yml):
+#   "mail"          - password resets and the outbox; never waits behind a notification fan-out
+#   "notifications" - new-post and comment notifications and feed fan-out
+#   "maintenance"   - bulk jobs such as counter reconciliation
+# Within a queue a lower priority number runs first. Routes carry the priorities; setting
+# CELERY_TASK_DEFAULT_PRIORITY would override them.
+CELERY_TASK_ROUTES = {
+    'blog_app.tasks.send_password_reset_email': {'queue': 'mail', 'priority': 0},
+    'blog_app.tasks.flush_mail_outbox': {'queue': 'mail', 'priority': 3},
+    'blog_app.tasks.fan_out_post_to_feeds': {'queue': 'notifications', 'priority': 2},
+    'blog_app.tasks.notify_readers_of_new_post': {'queue': 'notifications', 'priority': 4},
+    'blog_app.tasks.deliver_post_notifications': {'queue': 'notifications', 'priority': 5},
+    'blog_app.tasks.notify_readers_of_post_digest': {'queue': 'notifications', 'priority': 4},
+    'blog_app.tasks.deliver_post_digest': {'queue': 'notifications', 'priority': 5},
+    'blog_app.tasks.send_comment_digests': {'queue': 'notifications', 'priority': 6},
+    'blog_app.tasks.reconcile_counters': {'queue': 'maintenance', 'priority': 9},
+}
+# The Redis transport emulates priorities with one list per level, read in priority order
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+# Tasks are acknowledged after they finish, so a crashed worker's task is redelivered rather than lost.
+# All tasks are safe to re-run except send_password_reset_email, which acknowledges early to never mail twice.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
 
 
 # Task serialization format (optional)
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Periodic tasks, run by `celery -A blog_project beat`
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-counters': {
+        'task': 'blog_app.tasks.reconcile_counters',
+        'schedule': 60 * 60,
+    },
+    'send-comment-digests': {
+        'task': 'blog_app.tasks.send_comment_digests',
+        'schedule': COMMENT_DIGEST_WINDOW,
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -151,10 +325,15 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "blog_app.User"
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Set EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend to benchmark offline
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS= True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
+# Give up on an unresponsive SMTP server instead of hanging the worker
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '10'))
+# Seconds a pooled worker SMTP connection may sit idle before it is checked with NOOP
+EMAIL_HEALTH_CHECK_INTERVAL = int(os.getenv('EMAIL_HEALTH_CHECK_INTERVAL', '30'))